@@ -1,6 +1,26 @@
 import anthropic
+import httpx
+import json
 from openai import OpenAI
-from typing import List, Optional, Dict, Any
+from types import SimpleNamespace
+from typing import List, Optional, Dict, Any, Iterator
+
+# Fixed request fragments shared across calls; treat as read-only
+_AUTO_TOOL_CHOICE = {"type": "auto"}
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+
+def _anthropic_to_openai_tool(tool: Dict[str, Any]) -> Dict[str, Any]:
+    """Translate an Anthropic tool definition to the OpenAI function format"""
+    return {
+        "type": "function",
+        "function": {
+            "name": tool["name"],
+            "description": tool.get("description", ""),
+            "parameters": tool["input_schema"]
+        }
+    }
+
 
 class AIGenerator:
     """Handles interactions with Anthropic's Claude API for generating responses"""
@@ -51,12 +71,23 @@ All responses must be:
 Provide only the direct answer to what was asked.
 """
     
+    # Connection pool settings shared by both provider clients
+    HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=120)
+    HTTP_TIMEOUT = 60.0
+    HTTP_RETRIES = 2
+    
     def __init__(self, api_key: str, model: str, provider: str = "anthropic", base_url: str = None):
         self.provider = provider
         self.model = model
         
         if provider == "anthropic":
-            self.client = anthropic.Anthropic(api_key=api_key)
+            self.client = anthropic.Anthropic(api_key=api_key, http_client=self._build_http_client())
+            # Static system prompt block marked for ephemeral prompt caching
+            self._cached_system = [{
+                "type": "text",
+                "text": self.SYSTEM_PROMPT,
+                "cache_control": _EPHEMERAL_CACHE
+            }]
             # Pre-build base API parameters for Anthropic
             self.base_params = {
                 "model": self.model,
@@ -64,7 +95,9 @@ Provide only the direct answer to what was asked.
                 "max_tokens": 800
             }
         elif provider == "deepseek":
-            self.client = OpenAI(api_key=api_key, base_url=base_url)
+            self.client = OpenAI(api_key=api_key, base_url=base_url, http_client=self._build_http_client())
+            # Last translated tool list, reused while the caller passes the same list
+            self._openai_tools = (None, None)
             # Pre-build base API parameters for DeepSeek/OpenAI
             self.base_params = {
                 "model": self.model,
@@ -74,8 +107,78 @@ Provide only the direct answer to what was asked.
         else:
             raise ValueError(f"Unsupported provider: {provider}")
     
+    def _build_http_client(self) -> httpx.Client:
+        """Build a keep-alive HTTP client so TCP/TLS setup is reused across calls"""
+        transport = httpx.HTTPTransport(limits=self.HTTP_LIMITS, retries=self.HTTP_RETRIES)
+        return httpx.Client(transport=transport, timeout=self.HTTP_TIMEOUT)
+    
+    def _build_api_params(self, query: str,
+                          messages: Optional[List[Dict[str, str]]] = None,
+                          tools: Optional[List] = None) -> Dict[str, Any]:
+        """Build provider request parameters for a user query"""
+        # History travels as a message array in the same shape as the new
+        # turn, so each request's messages extend the previous one unchanged.
+        # Only the static system prompt carries a cache breakpoint: a
+        # breakpoint on the newest turn would be written every turn but never
+        # read back once the history window starts sliding
+        history = messages or []
+        user_message = {"role": "user", "content": query}
+        if self.provider == "anthropic":
+            system_content = self._cached_system
+        else:
+            system_content = self.SYSTEM_PROMPT
+        
+        # Prepare API call parameters from a shallow copy of the prebuilt base
+        api_params = self.base_params.copy()
+        api_params["messages"] = history + [user_message]
+        api_params["system"] = system_content
+        
+        # Add tools if available
+        if tools:
+            api_params["tools"] = tools
+            api_params["tool_choice"] = _AUTO_TOOL_CHOICE
+        
+        return api_params
+    
+    def _build_openai_params(self, api_params: Dict[str, Any]) -> Dict[str, Any]:
+        """Convert Anthropic-style parameters to the OpenAI chat format"""
+        # base_params already holds the OpenAI fields
+        openai_params = self.base_params.copy()
+        openai_params["messages"] = [{"role": "system", "content": api_params["system"]}] + api_params["messages"]
+        if "tools" in api_params:
+            openai_params["tools"] = self._translate_tools(api_params["tools"])
+            openai_params["tool_choice"] = "auto"
+        return openai_params
+    
+    def _translate_tools(self, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Translate tool definitions, reusing the last result for the same list object"""
+        source, translated = self._openai_tools
+        if source is not tools:
+            translated = [_anthropic_to_openai_tool(tool) for tool in tools]
+            self._openai_tools = (tools, translated)
+        return translated
+    
+    def _from_openai_response(self, response) -> SimpleNamespace:
+        """Normalize an OpenAI chat completion to the Anthropic response shape"""
+        choice = response.choices[0]
+        message = choice.message
+        if choice.finish_reason == "tool_calls" and message.tool_calls:
+            content = [
+                SimpleNamespace(
+                    type="tool_use",
+                    id=call.id,
+                    name=call.function.name,
+                    input=json.loads(call.function.arguments or "{}")
+                )
+                for call in message.tool_calls
+            ]
+            return SimpleNamespace(content=content, stop_reason="tool_use", message=message)
+        
+        content = [SimpleNamespace(type="text", text=message.content)]
+        return SimpleNamespace(content=content, stop_reason=choice.finish_reason, message=message)
+    
     def generate_response(self, query: str,
-                         conversation_history: Optional[str] = None,
+                         messages: Optional[List[Dict[str, str]]] = None,
                          tools: Optional[List] = None,
                          tool_manager=None) -> str:
         """
@@ -83,52 +186,25 @@ Provide only the direct answer to what was asked.
         
         Args:
             query: The user's question or request
-            conversation_history: Previous messages for context
+            messages: Previous conversation messages as role/content dicts
             tools: Available tools the AI can use
             tool_manager: Manager to execute tools
             
         Returns:
             Generated response as string
         """
-        
-        # Build system content efficiently - avoid string ops when possible
-        system_content = (
-            f"{self.SYSTEM_PROMPT}\n\nPrevious conversation:\n{conversation_history}"
-            if conversation_history 
-            else self.SYSTEM_PROMPT
-        )
-        
-        # Prepare API call parameters efficiently
-        api_params = {
-            **self.base_params,
-            "messages": [{"role": "user", "content": query}],
-            "system": system_content
-        }
-        
-        # Add tools if available
-        if tools:
-            api_params["tools"] = tools
-            api_params["tool_choice"] = {"type": "auto"}
+        # Without a manager a tool call could not be answered, so offer no tools
+        if not tool_manager:
+            tools = None
+        api_params = self._build_api_params(query, messages, tools)
         
         # Get response based on provider
         if self.provider == "anthropic":
             response = self.client.messages.create(**api_params)
         elif self.provider == "deepseek":
-            # Convert to OpenAI format
-            openai_messages = [{"role": "system", "content": system_content}] + api_params["messages"]
-            openai_params = {
-                "model": self.model,
-                "messages": openai_messages,
-                "temperature": 0,
-                "max_tokens": 800
-            }
-            response = self.client.chat.completions.create(**openai_params)
-            # Convert response format
-            class MockResponse:
-                def __init__(self, content_text, stop_reason="stop"):
-                    self.content = [type('obj', (object,), {'text': content_text})]
-                    self.stop_reason = stop_reason
-            response = MockResponse(response.choices[0].message.content)
+            # Convert to OpenAI format; tool calls come back as tool_use blocks
+            api_params = self._build_openai_params(api_params)
+            response = self._from_openai_response(self.client.chat.completions.create(**api_params))
         
         # Handle tool execution if needed
         if response.stop_reason == "tool_use" and tool_manager:
@@ -137,6 +213,55 @@ Provide only the direct answer to what was asked.
         # Return direct response
         return response.content[0].text
     
+    def generate_response_stream(self, query: str,
+                                 messages: Optional[List[Dict[str, str]]] = None,
+                                 tools: Optional[List] = None,
+                                 tool_manager=None) -> Iterator[str]:
+        """
+        Stream AI response text as it is generated.
+        
+        Tool-use turns are buffered until the model stops, the tools are
+        executed, and streaming resumes on the follow-up call.
+        
+        Args:
+            query: The user's question or request
+            messages: Previous conversation messages as role/content dicts
+            tools: Available tools the AI can use
+            tool_manager: Manager to execute tools
+            
+        Yields:
+            Response text fragments
+        """
+        # Without a manager a tool call could not be answered, so offer no tools
+        if not tool_manager:
+            tools = None
+        api_params = self._build_api_params(query, messages, tools)
+        
+        if self.provider == "deepseek":
+            openai_params = self._build_openai_params(api_params)
+            if tools:
+                # Tool calls arrive as argument fragments, so settle the tool turn first
+                response = self._from_openai_response(self.client.chat.completions.create(**openai_params))
+                if response.stop_reason != "tool_use":
+                    yield response.content[0].text
+                    return
+                openai_params = self._build_tool_followup(response, openai_params, tool_manager)
+            openai_params["stream"] = True
+            for chunk in self.client.chat.completions.create(**openai_params):
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+            return
+        
+        with self.client.messages.stream(**api_params) as stream:
+            yield from stream.text_stream
+            response = stream.get_final_message()
+        
+        # Resume streaming on the follow-up call after running tools
+        if response.stop_reason == "tool_use" and tool_manager:
+            final_params = self._build_tool_followup(response, api_params, tool_manager)
+            with self.client.messages.stream(**final_params) as stream:
+                yield from stream.text_stream
+    
     def _handle_tool_execution(self, initial_response, base_params: Dict[str, Any], tool_manager):
         """
         Handle execution of tool calls and get follow-up response.
@@ -149,38 +274,76 @@ Provide only the direct answer to what was asked.
         Returns:
             Final response text after tool execution
         """
+        final_params = self._build_tool_followup(initial_response, base_params, tool_manager)
+        
+        # Get final response
+        if self.provider == "deepseek":
+            final_response = self.client.chat.completions.create(**final_params)
+            return final_response.choices[0].message.content
+        final_response = self.client.messages.create(**final_params)
+        return final_response.content[0].text
+    
+    def _build_tool_followup(self, initial_response, base_params: Dict[str, Any], tool_manager) -> Dict[str, Any]:
+        """
+        Execute requested tools and build parameters for the follow-up call.
+        
+        Args:
+            initial_response: The response containing tool use requests
+            base_params: Base API parameters
+            tool_manager: Manager to execute tools
+            
+        Returns:
+            API parameters for the final call, without tools
+        """
+        # Execute all tool calls concurrently and collect results in call order
+        tool_calls = [block for block in initial_response.content if block.type == "tool_use"]
+        outputs = tool_manager.execute_tools(
+            [(block.name, block.input) for block in tool_calls]
+        )
+        
         # Start with existing messages
         messages = base_params["messages"].copy()
+        final_params = self.base_params.copy()
+        
+        if self.provider == "deepseek":
+            # OpenAI format: assistant tool_calls message, then one tool message per call
+            messages.append({
+                "role": "assistant",
+                "content": initial_response.message.content,
+                "tool_calls": [
+                    {
+                        "id": call.id,
+                        "type": "function",
+                        "function": {"name": call.function.name, "arguments": call.function.arguments}
+                    }
+                    for call in initial_response.message.tool_calls
+                ]
+            })
+            messages.extend(
+                {"role": "tool", "tool_call_id": block.id, "content": output}
+                for block, output in zip(tool_calls, outputs)
+            )
+            final_params["messages"] = messages
+            return final_params
         
         # Add AI's tool use response
         messages.append({"role": "assistant", "content": initial_response.content})
         
-        # Execute all tool calls and collect results
-        tool_results = []
-        for content_block in initial_response.content:
-            if content_block.type == "tool_use":
-                tool_result = tool_manager.execute_tool(
-                    content_block.name, 
-                    **content_block.input
-                )
-                
-                tool_results.append({
-                    "type": "tool_result",
-                    "tool_use_id": content_block.id,
-                    "content": tool_result
-                })
+        tool_results = [
+            {
+                "type": "tool_result",
+                "tool_use_id": block.id,
+                "content": output
+            }
+            for block, output in zip(tool_calls, outputs)
+        ]
         
         # Add tool results as single message
         if tool_results:
             messages.append({"role": "user", "content": tool_results})
         
         # Prepare final API call without tools
-        final_params = {
-            **self.base_params,
-            "messages": messages,
-            "system": base_params["system"]
-        }
+        final_params["messages"] = messages
+        final_params["system"] = base_params["system"]
         
-        # Get final response
-        final_response = self.client.messages.create(**final_params)
-        return final_response.content[0].text
\ No newline at end of file
+        return final_params
@@ -5,8 +5,11 @@ from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
+import asyncio
+import json
 import os
 
 from config import config
@@ -86,6 +89,28 @@ async def query_documents(request: QueryRequest):
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
+@app.post("/api/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    """Stream a query response as server-sent events, ending with sources"""
+    session_id = request.session_id
+    if not session_id:
+        session_id = rag_system.session_manager.create_session()
+    
+    def event_stream():
+        try:
+            for item in rag_system.query_stream(request.query, session_id):
+                # The final item is this query's sources, not text
+                if isinstance(item, list):
+                    yield f"data: {json.dumps({'type': 'done', 'sources': item, 'session_id': session_id})}\n\n"
+                else:
+                    yield f"data: {json.dumps({'type': 'text', 'text': item})}\n\n"
+        except Exception as e:
+            print(f"Stream query error: {str(e)}")
+            yield f"data: {json.dumps({'type': 'error', 'detail': f'Query failed: {str(e)}'})}\n\n"
+    
+    # Sync generator is iterated in the threadpool, keeping the event loop free
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
 @app.get("/api/courses", response_model=CourseStats)
 async def get_course_stats():
     """Get course analytics and statistics"""
@@ -121,6 +146,12 @@ async def startup_event():
             print(f"Loaded {courses} courses with {chunks} chunks")
         except Exception as e:
             print(f"Error loading documents: {e}")
+    
+    # Warm the embedding model and index so the first query doesn't pay for it
+    try:
+        await asyncio.to_thread(rag_system.vector_store.search, "warmup", limit=1)
+    except Exception as e:
+        print(f"Error warming vector store: {e}")
 
 # Custom static file handler with no-cache headers for development
 from fastapi.staticfiles import StaticFiles
@@ -1,4 +1,4 @@
-from typing import List, Tuple, Optional, Dict
+from typing import List, Tuple, Optional, Dict, Iterator, Union
 import os
 from document_processor import DocumentProcessor
 from vector_store import VectorStore
@@ -59,6 +59,9 @@ class RAGSystem:
             # Add course content chunks to vector store
             self.vector_store.add_course_content(course_chunks)
             
+            # Cached tool responses may no longer reflect the store
+            self.tool_manager.clear_caches()
+            
             return course, len(course_chunks)
         except Exception as e:
             print(f"Error processing course document {file_path}: {e}")
@@ -82,6 +85,7 @@ class RAGSystem:
         if clear_existing:
             print("Clearing existing data for fresh rebuild...")
             self.vector_store.clear_all_data()
+            self.tool_manager.clear_caches()
         
         if not os.path.exists(folder_path):
             print(f"Folder {folder_path} does not exist")
@@ -112,6 +116,10 @@ class RAGSystem:
                 except Exception as e:
                     print(f"Error processing {file_name}: {e}")
         
+        # Cached tool responses may no longer reflect the store
+        if total_courses:
+            self.tool_manager.clear_caches()
+        
         return total_courses, total_chunks
     
     def query(self, query: str, session_id: Optional[str] = None) -> Tuple[str, List[str]]:
@@ -131,29 +139,70 @@ class RAGSystem:
         # Get conversation history if session exists
         history = None
         if session_id:
-            history = self.session_manager.get_conversation_history(session_id)
+            history = self.session_manager.get_messages(session_id)
+        
+        # Per-request manager, so concurrent queries keep their own sources
+        tool_manager = self.tool_manager.scoped()
         
         # Generate response using AI with tools
         response = self.ai_generator.generate_response(
             query=prompt,
-            conversation_history=history,
+            messages=history,
             tools=self.tool_manager.get_tool_definitions(),
-            tool_manager=self.tool_manager
+            tool_manager=tool_manager
         )
         
         # Get sources from the search tool
-        sources = self.tool_manager.get_last_sources()
-
-        # Reset sources after retrieving them
-        self.tool_manager.reset_sources()
+        sources = tool_manager.get_last_sources()
         
-        # Update conversation history
+        # Update conversation history with the prompt exactly as sent, so the
+        # next turn's history repeats this turn's messages byte for byte
         if session_id:
-            self.session_manager.add_exchange(session_id, query, response)
+            self.session_manager.add_exchange(session_id, prompt, response)
         
         # Return response with sources from tool searches
         return response, sources
     
+    def query_stream(self, query: str, session_id: Optional[str] = None) -> Iterator[Union[str, List[str]]]:
+        """
+        Stream a response to a user query using the RAG system with tool-based search.
+        
+        Conversation history is updated with the full response once the text
+        is exhausted, and the sources for this query are yielded last.
+        
+        Args:
+            query: User's question
+            session_id: Optional session ID for conversation context
+            
+        Yields:
+            Response text fragments, then the list of sources as the final item
+        """
+        prompt = f"""Answer this question about course materials: {query}"""
+        
+        history = None
+        if session_id:
+            history = self.session_manager.get_messages(session_id)
+        
+        # Per-request manager, so concurrent streams keep their own sources
+        tool_manager = self.tool_manager.scoped()
+        
+        parts = []
+        for text in self.ai_generator.generate_response_stream(
+            query=prompt,
+            messages=history,
+            tools=self.tool_manager.get_tool_definitions(),
+            tool_manager=tool_manager
+        ):
+            parts.append(text)
+            yield text
+        
+        sources = tool_manager.get_last_sources()
+        
+        if session_id:
+            self.session_manager.add_exchange(session_id, prompt, "".join(parts))
+        
+        yield sources
+    
     def get_course_analytics(self) -> Dict:
         """Get analytics about the course catalog"""
         return {
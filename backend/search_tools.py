@@ -1,8 +1,102 @@
-from typing import Dict, Any, Optional, Protocol
+from typing import Dict, Any, Optional, Protocol, Hashable, List, Tuple
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
 from vector_store import VectorStore, SearchResults
 
 
+# Static tool definitions, shared by reference (treat as read-only)
+_SEARCH_TOOL_DEF = {
+    "name": "search_course_content",
+    "description": "Search course materials with smart course name matching and lesson filtering",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "query": {
+                "type": "string", 
+                "description": "What to search for in the course content"
+            },
+            "course_name": {
+                "type": "string",
+                "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')"
+            },
+            "lesson_number": {
+                "type": "integer",
+                "description": "Specific lesson number to search within (e.g. 1, 2, 3)"
+            }
+        },
+        "required": ["query"]
+    }
+}
+
+_OUTLINE_TOOL_DEF = {
+    "name": "get_course_outline",
+    "description": "Get complete course outline including course title, link, and all lessons with their numbers and titles",
+    "input_schema": {
+        "type": "object",
+        "properties": {
+            "course_title": {
+                "type": "string",
+                "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction', 'Build Rich-Context AI Apps')"
+            }
+        },
+        "required": ["course_title"]
+    }
+}
+
+
+class ResponseCache:
+    """Bounded LRU cache for formatted tool responses, safe to share across threads"""
+    
+    def __init__(self, maxsize: int = 512):
+        self.maxsize = maxsize
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()  # Lookups reorder entries, so reads need it too
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Hashable, value: Any):
+        """Store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def clear(self):
+        """Drop all cached entries"""
+        with self._lock:
+            self._entries.clear()
+
+
+_type_names: Dict[type, str] = {}  # Type -> name, for validation messages
+
+
+def _type_name(value: Any) -> str:
+    """Return the name of the value's type, looked up once per type"""
+    value_type = type(value)
+    name = _type_names.get(value_type)
+    if name is None:
+        name = _type_names[value_type] = value_type.__name__
+    return name
+
+
+def _query_error(query: Any) -> str:
+    """Describe why a search query was rejected"""
+    if query is None:
+        return "Error: Query cannot be None. Please provide a search query."
+    if not isinstance(query, str):
+        return f"Error: Query must be a string, got {_type_name(query)}."
+    return "Error: Query cannot be empty. Please provide a search query."
+
+
 class Tool(ABC):
     """Abstract base class for all tools"""
     
@@ -23,31 +117,11 @@ class CourseSearchTool(Tool):
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
         self.last_sources = []  # Track sources from last search
+        self.cache = ResponseCache()  # (text, sources) keyed by normalized arguments
     
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "search_course_content",
-            "description": "Search course materials with smart course name matching and lesson filtering",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "query": {
-                        "type": "string", 
-                        "description": "What to search for in the course content"
-                    },
-                    "course_name": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction')"
-                    },
-                    "lesson_number": {
-                        "type": "integer",
-                        "description": "Specific lesson number to search within (e.g. 1, 2, 3)"
-                    }
-                },
-                "required": ["query"]
-            }
-        }
+        return _SEARCH_TOOL_DEF
     
     def execute(self, query: str, course_name: Optional[str] = None, lesson_number: Optional[int] = None) -> str:
         """
@@ -62,22 +136,25 @@ class CourseSearchTool(Tool):
             Formatted search results or error message
         """
         
-        # Input validation
-        if query is None:
-            return "Error: Query cannot be None. Please provide a search query."
-        
-        if not isinstance(query, str):
-            return f"Error: Query must be a string, got {type(query).__name__}."
-        
-        if not query.strip():
-            return "Error: Query cannot be empty. Please provide a search query."
+        # Input validation; the specific message is only worked out on failure
+        normalized = query.strip().lower() if isinstance(query, str) else None
+        if not normalized:
+            return _query_error(query)
         
         # Parameter validation
-        if course_name is not None and not isinstance(course_name, str):
-            return f"Error: Course name must be a string, got {type(course_name).__name__}."
+        if course_name is not None and type(course_name) is not str:
+            return f"Error: Course name must be a string, got {_type_name(course_name)}."
         
-        if lesson_number is not None and not isinstance(lesson_number, int):
-            return f"Error: Lesson number must be an integer, got {type(lesson_number).__name__}."
+        if lesson_number is not None and type(lesson_number) is not int:
+            return f"Error: Lesson number must be an integer, got {_type_name(lesson_number)}."
+        
+        # Serve repeated searches without touching the vector store
+        cache_key = (normalized, course_name, lesson_number)
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            formatted, sources = cached
+            self.last_sources = list(sources)
+            return formatted
         
         # Use the vector store's unified search interface
         try:
@@ -89,7 +166,7 @@ class CourseSearchTool(Tool):
         except Exception as e:
             return f"Search error: {str(e)}"
         
-        # Handle errors
+        # Handle errors (not cached, they may be transient)
         if results.error:
             return results.error
         
@@ -101,38 +178,27 @@ class CourseSearchTool(Tool):
                 filter_info += f" in course '{course_name}'"
             if lesson_number:
                 filter_info += f" in lesson {lesson_number}"
-            return f"No relevant content found{filter_info}."
+            formatted = f"No relevant content found{filter_info}."
+        else:
+            formatted = self._format_results(results)
         
-        # Format and return results
-        return self._format_results(results)
+        self.cache.put(cache_key, (formatted, list(self.last_sources)))
+        return formatted
     
     def _format_results(self, results: SearchResults) -> str:
         """Format search results with course and lesson context"""
-        formatted = []
-        sources = []  # Track sources for the UI
-        
-        for doc, meta in zip(results.documents, results.metadata):
-            course_title = meta.get('course_title', 'unknown')
-            lesson_num = meta.get('lesson_number')
-            
-            # Build context header
-            header = f"[{course_title}"
-            if lesson_num is not None:
-                header += f" - Lesson {lesson_num}"
-            header += "]"
-            
-            # Track source for the UI
-            source = course_title
-            if lesson_num is not None:
-                source += f" - Lesson {lesson_num}"
-            sources.append(source)
-            
-            formatted.append(f"{header}\n{doc}")
+        # Source label per result, e.g. "Course - Lesson 2", also used as the header
+        sources = [
+            f"{meta.get('course_title', 'unknown')} - Lesson {meta['lesson_number']}"
+            if meta.get('lesson_number') is not None
+            else meta.get('course_title', 'unknown')
+            for meta in results.metadata
+        ]
         
         # Store sources for retrieval
         self.last_sources = sources
         
-        return "\n\n".join(formatted)
+        return "\n\n".join(f"[{source}]\n{doc}" for source, doc in zip(sources, results.documents))
 
 
 class CourseOutlineTool(Tool):
@@ -141,23 +207,11 @@ class CourseOutlineTool(Tool):
     def __init__(self, vector_store: VectorStore):
         self.store = vector_store
         self.last_sources = []
+        self.cache = ResponseCache()  # (text, sources) keyed by normalized title
     
     def get_tool_definition(self) -> Dict[str, Any]:
         """Return Anthropic tool definition for this tool"""
-        return {
-            "name": "get_course_outline",
-            "description": "Get complete course outline including course title, link, and all lessons with their numbers and titles",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "course_title": {
-                        "type": "string",
-                        "description": "Course title (partial matches work, e.g. 'MCP', 'Introduction', 'Build Rich-Context AI Apps')"
-                    }
-                },
-                "required": ["course_title"]
-            }
-        }
+        return _OUTLINE_TOOL_DEF
     
     def execute(self, course_title: str) -> str:
         """
@@ -170,6 +224,14 @@ class CourseOutlineTool(Tool):
             Formatted course outline or error message
         """
         
+        # Serve repeated outline requests without touching the vector store
+        cache_key = course_title.strip().lower() if isinstance(course_title, str) else course_title
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            outline, sources = cached
+            self.last_sources = list(sources)
+            return outline
+        
         # Get course metadata from the vector store
         try:
             course_data = self._get_course_metadata(course_title)
@@ -178,7 +240,9 @@ class CourseOutlineTool(Tool):
                 return f"No course found matching '{course_title}'. Please check the course title and try again."
             
             # Format and return the outline
-            return self._format_course_outline(course_data)
+            outline = self._format_course_outline(course_data)
+            self.cache.put(cache_key, (outline, list(self.last_sources)))
+            return outline
             
         except Exception as e:
             return f"Error retrieving course outline: {str(e)}"
@@ -186,6 +250,12 @@ class CourseOutlineTool(Tool):
     def _get_course_metadata(self, course_title: str) -> Optional[Dict[str, Any]]:
         """Get course metadata from the vector store"""
         
+        # Catalog lookup avoids embedding the title and scanning content chunks
+        outline = self.store.get_course_outline(course_title)
+        if outline:
+            return outline
+        
+        # Fall back to searching content when the catalog has no match
         # Search for course metadata using the vector store's search functionality
         # This will help us find the course even with partial matches
         results = self.store.search(
@@ -203,68 +273,66 @@ class CourseOutlineTool(Tool):
             'link': None,
             'lessons': []
         }
+        seen = set()  # (number, title) pairs already collected
+        lessons = []
         
         # Process metadata to extract course information
-        for doc, metadata in zip(results.documents, results.metadata):
+        for metadata in results.metadata:
             course_title_meta = metadata.get('course_title')
-            course_link = metadata.get('course_link', '')
             lesson_number = metadata.get('lesson_number')
             lesson_title = metadata.get('lesson_title', '')
             
             # Set course title and link (use first match)
             if not course_data['title'] and course_title_meta:
                 course_data['title'] = course_title_meta
-                course_data['link'] = course_link
+                course_data['link'] = metadata.get('course_link', '')
             
-            # Add lesson information if available
+            # Add lesson information if available, skipping duplicates
             if lesson_number is not None and lesson_title:
-                lesson_info = {
-                    'number': lesson_number,
-                    'title': lesson_title
-                }
-                
-                # Avoid duplicates
-                if lesson_info not in course_data['lessons']:
-                    course_data['lessons'].append(lesson_info)
+                key = (lesson_number, lesson_title)
+                if key not in seen:
+                    seen.add(key)
+                    lessons.append({'number': lesson_number, 'title': lesson_title})
         
         # Sort lessons by number
-        course_data['lessons'].sort(key=lambda x: x['number'])
+        lessons.sort(key=lambda x: x['number'])
+        course_data['lessons'] = lessons
         
         return course_data if course_data['title'] else None
     
     def _format_course_outline(self, course_data: Dict[str, Any]) -> str:
         """Format course outline for display"""
         
-        outline_parts = []
-        
-        # Course title
-        outline_parts.append(f"**Course Title:** {course_data['title']}")
+        title = course_data['title']
+        lessons = course_data['lessons']
         
-        # Course link (if available)
-        if course_data.get('link'):
-            outline_parts.append(f"**Course Link:** {course_data['link']}")
+        # Course link line only when a link is available
+        link_line = f"\n**Course Link:** {course_data['link']}" if course_data.get('link') else ""
         
         # Lessons
-        if course_data['lessons']:
-            outline_parts.append(f"**Total Lessons:** {len(course_data['lessons'])}")
-            outline_parts.append("\n**Course Outline:**")
-            
-            for lesson in course_data['lessons']:
-                outline_parts.append(f"  {lesson['number']}. {lesson['title']}")
+        if lessons:
+            lessons_str = "\n".join(f"  {lesson['number']}. {lesson['title']}" for lesson in lessons)
+            lessons_block = f"**Total Lessons:** {len(lessons)}\n\n**Course Outline:**\n{lessons_str}"
         else:
-            outline_parts.append("**Lessons:** No lesson information available")
+            lessons_block = "**Lessons:** No lesson information available"
         
         # Set sources for UI
-        self.last_sources = [course_data['title']]
+        self.last_sources = [title]
         
-        return "\n".join(outline_parts)
+        return f"**Course Title:** {title}{link_line}\n{lessons_block}"
 
 
 class ToolManager:
     """Manages available tools for the AI"""
     
+    # Upper bound on tool calls executed in parallel for one model turn
+    MAX_PARALLEL_TOOLS = 8
+    
     def __init__(self):
         self.tools = {}
+        self._tool_locks: Dict[str, Lock] = {}  # Tool name -> lock held while it runs
+        self._defs_cache: Optional[list] = None  # Rebuilt after registration
+        self._last_sources: list = []  # Sources from the last execute_tool(s) call
     
     def register_tool(self, tool: Tool):
         """Register any tool that implements the Tool interface"""
@@ -273,40 +341,91 @@ class ToolManager:
         if not tool_name:
             raise ValueError("Tool must have a 'name' in its definition")
         self.tools[tool_name] = tool
+        self._tool_locks[tool_name] = Lock()
+        self._defs_cache = None
 
     
+    def scoped(self) -> 'ToolManager':
+        """Return a manager over the same tools that tracks its own sources
+        
+        Give each request its own, so concurrent requests never read or reset
+        each other's sources. Tools, their locks and caches stay shared.
+        """
+        scoped = ToolManager()
+        scoped.tools = self.tools
+        scoped._tool_locks = self._tool_locks
+        scoped._defs_cache = self._defs_cache
+        return scoped
+    
     def get_tool_definitions(self) -> list:
         """Get all tool definitions for Anthropic tool calling"""
-        return [tool.get_tool_definition() for tool in self.tools.values()]
+        # Definitions are static per tool, so build the list once
+        if self._defs_cache is None:
+            self._defs_cache = [tool.get_tool_definition() for tool in self.tools.values()]
+        return self._defs_cache
     
     def execute_tool(self, tool_name: str, **kwargs) -> str:
         """Execute a tool by name with given parameters"""
+        result, self._last_sources = self._run_tool(tool_name, kwargs)
+        return result
+    
+    def _run_tool(self, tool_name: str, kwargs: Dict[str, Any]) -> Tuple[str, list]:
+        """Run one tool call, returning its result text and a copy of its sources
+        
+        Tools keep their sources on the instance, which every caller shares,
+        so each tool runs under its own lock until its sources are copied.
+        """
         if tool_name not in self.tools:
-            return f"Tool '{tool_name}' not found. Available tools: {', '.join(self.tools.keys())}"
+            return f"Tool '{tool_name}' not found. Available tools: {', '.join(self.tools.keys())}", []
         
+        tool = self.tools[tool_name]
         try:
-            return self.tools[tool_name].execute(**kwargs)
+            with self._tool_locks[tool_name]:
+                result = tool.execute(**kwargs)
+                sources = list(getattr(tool, 'last_sources', ()))
         except TypeError as e:
             # Handle missing required parameters gracefully
             error_msg = str(e)
             if "required positional argument" in error_msg:
-                return f"Error: Missing required parameter for tool '{tool_name}'. {error_msg}"
-            return f"Error executing tool '{tool_name}': {error_msg}"
+                return f"Error: Missing required parameter for tool '{tool_name}'. {error_msg}", []
+            return f"Error executing tool '{tool_name}': {error_msg}", []
         except ValueError as e:
-            return f"Error: Invalid parameter value for tool '{tool_name}': {str(e)}"
+            return f"Error: Invalid parameter value for tool '{tool_name}': {str(e)}", []
         except Exception as e:
-            return f"Unexpected error in tool '{tool_name}': {str(e)}"
+            return f"Unexpected error in tool '{tool_name}': {str(e)}", []
+        return result, sources
+    
+    def execute_tools(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Execute several tool calls concurrently, returning results in call order
+        
+        Calls to different tools overlap; calls to the same tool wait for
+        each other, in this batch or any other, since each tool runs under
+        its own lock. Sources from every call are merged in call order.
+        """
+        if len(calls) <= 1:
+            return [self.execute_tool(name, **kwargs) for name, kwargs in calls]
+        
+        # Searches are I/O bound, so overlapping them turns the sum of
+        # latencies into roughly the slowest tool's share of the calls
+        workers = min(len(calls), self.MAX_PARALLEL_TOOLS)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            outcomes = list(executor.map(lambda call: self._run_tool(*call), calls))
+        
+        self._last_sources = list(dict.fromkeys(
+            source for _, sources in outcomes for source in sources
+        ))
+        return [result for result, _ in outcomes]
     
     def get_last_sources(self) -> list:
-        """Get sources from the last search operation"""
-        # Check all tools for last_sources attribute
+        """Get sources from the last tool execution"""
+        return self._last_sources
+
+    def clear_caches(self):
+        """Clear cached responses from all tools that keep a response cache"""
         for tool in self.tools.values():
-            if hasattr(tool, 'last_sources') and tool.last_sources:
-                return tool.last_sources
-        return []
+            if hasattr(tool, 'cache'):
+                tool.cache.clear()
 
     def reset_sources(self):
-        """Reset sources from all tools that track sources"""
-        for tool in self.tools.values():
-            if hasattr(tool, 'last_sources'):
-                tool.last_sources = []
\ No newline at end of file
+        """Reset sources from the last tool execution"""
+        self._last_sources = []
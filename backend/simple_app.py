@@ -1,14 +1,26 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List
+from collections import OrderedDict
+import json
+import os
+import time
 import uuid
 
-# Simple in-memory session storage
-sessions: Dict[str, List] = {}
+# Session store limits: LRU capacity, idle expiry and per-session window
+MAX_SESSIONS = int(os.getenv("MAX_SESSIONS", "10000"))
+SESSION_TTL = int(os.getenv("SESSION_TTL", "3600"))      # Seconds of inactivity
+MAX_TURNS = int(os.getenv("MAX_TURNS", "20"))            # Exchanges kept per session
 
-app = FastAPI()
+# Simple in-memory session storage, least recently used first
+sessions: "OrderedDict[str, List[Dict[str, str]]]" = OrderedDict()
+session_last_seen: Dict[str, float] = {}
+
+# orjson serializes answers and source lists faster than the stdlib encoder
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS
 app.add_middleware(
@@ -19,6 +31,39 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+def get_session(session_id: str) -> List[Dict[str, str]]:
+    """Fetch or create a session, keeping the store bounded by size and idle time"""
+    now = time.monotonic()
+    
+    # Expire idle sessions from the least recently used end
+    while sessions:
+        oldest = next(iter(sessions))
+        if now - session_last_seen[oldest] <= SESSION_TTL:
+            break
+        del sessions[oldest]
+        del session_last_seen[oldest]
+    
+    if session_id in sessions:
+        sessions.move_to_end(session_id)
+    else:
+        sessions[session_id] = []
+        if len(sessions) > MAX_SESSIONS:
+            evicted, _ = sessions.popitem(last=False)
+            del session_last_seen[evicted]
+    
+    session_last_seen[session_id] = now
+    return sessions[session_id]
+
+def add_exchange(messages: List[Dict[str, str]], query: str, answer: str):
+    """Append a question-answer exchange, keeping only the last MAX_TURNS exchanges"""
+    messages.append({"role": "user", "content": query})
+    messages.append({"role": "assistant", "content": answer})
+    # A zero window keeps nothing; messages[:-0] would be an empty slice
+    if MAX_TURNS <= 0:
+        messages.clear()
+    else:
+        del messages[:-MAX_TURNS * 2]
+
 class QueryRequest(BaseModel):
     query: str
     session_id: str = None
@@ -38,20 +83,36 @@ class ClearSessionResponse(BaseModel):
 @app.post("/api/query", response_model=QueryResponse)
 async def query_documents(request: QueryRequest):
     session_id = request.session_id or str(uuid.uuid4())
-    
-    if session_id not in sessions:
-        sessions[session_id] = []
+    messages = get_session(session_id)
     
     # Simple response for testing
     answer = f"Respuesta de prueba para: {request.query}"
-    sessions[session_id].append({"role": "user", "content": request.query})
-    sessions[session_id].append({"role": "assistant", "content": answer})
+    sources = ["Fuente de prueba"]
     
-    return QueryResponse(
-        answer=answer,
-        sources=["Fuente de prueba"],
-        session_id=session_id
-    )
+    add_exchange(messages, request.query, answer)
+    
+    # Serialize directly; response_model is kept for the OpenAPI schema only
+    return ORJSONResponse(content={
+        "answer": answer,
+        "sources": sources,
+        "session_id": session_id
+    })
+
+@app.post("/api/query/stream")
+async def query_documents_stream(request: QueryRequest):
+    session_id = request.session_id or str(uuid.uuid4())
+    messages = get_session(session_id)
+    
+    # Simple streamed response for testing
+    answer = f"Respuesta de prueba para: {request.query}"
+    add_exchange(messages, request.query, answer)
+    
+    def event_stream():
+        for word in answer.split(" "):
+            yield f"data: {json.dumps({'type': 'text', 'text': word + ' '})}\n\n"
+        yield f"data: {json.dumps({'type': 'done', 'sources': ['Fuente de prueba'], 'session_id': session_id})}\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 @app.post("/api/clear-session", response_model=ClearSessionResponse)
 async def clear_session(request: ClearSessionRequest):
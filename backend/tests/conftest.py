@@ -0,0 +1,8 @@
+"""Pytest configuration: make the backend modules importable from the tests"""
+
+import sys
+import pathlib
+
+_BACKEND_DIR = str(pathlib.Path(__file__).resolve().parent.parent)
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
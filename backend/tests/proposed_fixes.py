@@ -5,6 +5,44 @@ This file contains the specific code changes needed to fix the failing tests
 and improve system robustness.
 """
 
+import os
+import re
+import sys
+import time
+from types import MappingProxyType
+from typing import Optional
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from search_tools import Tool
+from vector_store import SearchResults
+
+# Validation messages shared by the fixes below. Fixed messages are interned
+# once; type errors are formatted once per offending type, then reused
+_SEARCH_ERR_QUERY_NONE = sys.intern("Query cannot be None")
+_SEARCH_ERR_QUERY_EMPTY = sys.intern("Query cannot be empty")
+_SEARCH_ERR_QUERY_TYPE = "Query must be a string, got %s"
+_SEARCH_ERR_COURSE_TYPE = "Course name must be a string, got %s"
+_SEARCH_ERR_LESSON_TYPE = "Lesson number must be an integer, got %s"
+_SEARCH_ERR_LIMIT = sys.intern("Limit must be a positive integer")
+_MOCK_ERR_QUERY_TYPE = "Query must be string, got %s"
+
+_formatted_type_errors = {}  # (template, type) -> formatted message
+
+_NUMBER_RE = re.compile(r"\d+")  # Numbers that must match exactly for a semantic cache hit
+
+
+def _type_error(template: str, value) -> str:
+    """Return template filled with the value's type name, formatting each pair once"""
+    key = (template, type(value))
+    message = _formatted_type_errors.get(key)
+    if message is None:
+        message = _formatted_type_errors[key] = template % type(value).__name__
+    return message
+
+
 # Fix 1: CourseSearchTool input validation
 # File: search_tools.py, Line: 52
 def execute_fixed(self, query: str, course_name: Optional[str] = None, lesson_number: Optional[int] = None) -> str:
@@ -20,30 +58,18 @@ def execute_fixed(self, query: str, course_name: Optional[str] = None, lesson_nu
         Formatted search results or error message
     """
     
-    # INPUT VALIDATION (NEW)
-    if query is None:
-        return "Error: Query cannot be None. Please provide a search query."
-    
-    if not isinstance(query, str):
-        return f"Error: Query must be a string, got {type(query).__name__}."
-    
-    if not query.strip():
-        return "Error: Query cannot be empty. Please provide a search query."
-    
-    # PARAMETER VALIDATION (NEW)
-    if course_name is not None and not isinstance(course_name, str):
-        return f"Error: Course name must be a string, got {type(course_name).__name__}."
-    
-    if lesson_number is not None and not isinstance(lesson_number, int):
-        return f"Error: Lesson number must be an integer, got {type(lesson_number).__name__}."
-    
-    # Use the vector store's unified search interface
+    # Use the vector store's unified search interface. Arguments are not
+    # checked here (NEW): the store raises TypeError/ValueError for bad
+    # input before searching (Fix 4) and this is the single place that
+    # reports it
     try:
         results = self.store.search(
             query=query,
             course_name=course_name,
             lesson_number=lesson_number
         )
+    except (TypeError, ValueError) as e:
+        return f"Error: {e}"
     except Exception as e:
         return f"Search error: {str(e)}"
     
@@ -70,7 +96,10 @@ def execute_fixed(self, query: str, course_name: Optional[str] = None, lesson_nu
 def execute_tool_fixed(self, tool_name: str, **kwargs) -> str:
     """FIXED VERSION: Execute a tool by name with given parameters"""
     if tool_name not in self.tools:
-        return f"Tool '{tool_name}' not found. Available tools: {', '.join(self.tools.keys())}"
+        available = self._tools_list_cache
+        if available is None:
+            available = self._refresh_tools_list()
+        return f"Tool '{tool_name}' not found. Available tools: {available}"
     
     try:
         return self.tools[tool_name].execute(**kwargs)
@@ -86,18 +115,69 @@ def execute_tool_fixed(self, tool_name: str, **kwargs) -> str:
         return f"Unexpected error in tool '{tool_name}': {str(e)}"
 
 
+# Fix 2b: Cached tool name list for the not-found message in Fix 2
+# File: search_tools.py (ToolManager)
+#
+# In __init__:
+#     self._tools_list_cache = None  # Joined tool names, rebuilt after registration
+def register_tool_fixed(self, tool: Tool):
+    """Register any tool that implements the Tool interface"""
+    tool_def = tool.get_tool_definition()
+    tool_name = tool_def.get("name")
+    if not tool_name:
+        raise ValueError("Tool must have a 'name' in its definition")
+    self.tools[tool_name] = tool
+    self._defs_cache = None
+    self._tools_list_cache = None
+
+
+def _refresh_tools_list(self) -> str:
+    """Join the registered tool names once and keep the result until the next registration"""
+    self._tools_list_cache = ', '.join(self.tools.keys())
+    return self._tools_list_cache
+
+
 # Fix 3: Enhanced MockVectorStore for better testing
 # File: test_helpers.py
+# Canned mock results, shared read-only across calls: tuples for the
+# sequences and mapping proxies for the metadata
+_MOCK_EMPTY = SearchResults(documents=(), metadata=(), distances=())
+_MOCK_ERROR = SearchResults.empty("Mock search error")
+_MOCK_PYTHON_HIT = SearchResults(
+    documents=(
+        "Python is a programming language used for data science and web development.",
+        "This lesson covers basic Python syntax and variables."
+    ),
+    metadata=(
+        MappingProxyType({"course_title": "Python Fundamentals", "lesson_number": 1, "lesson_title": "Introduction to Python"}),
+        MappingProxyType({"course_title": "Python Fundamentals", "lesson_number": 2, "lesson_title": "Variables and Data Types"})
+    ),
+    distances=(0.2, 0.3)
+)
+
 class MockVectorStoreFixed:
     """Enhanced mock vector store that matches real VectorStore interface"""
     
+    # Query keywords -> canned outcome, matched in a single case-insensitive scan
+    _KEYWORDS = {
+        "no results": "empty",
+        "error": "error",
+        "python": "hit",
+        "introduction": "hit",
+        "lesson": "hit"
+    }
+    _KEYWORD_RE = re.compile("|".join(map(re.escape, _KEYWORDS)), re.IGNORECASE)
+    
+    __slots__ = ('mock_courses', 'mock_content', 'last_query', 'last_filters',
+                 '_titles', '_course_metadata', '_content_chunks')
+    
     def __init__(self, mock_courses=None, mock_content=None):
         self.mock_courses = mock_courses or {}
         self.mock_content = mock_content or []
         self.last_query = None
         self.last_filters = None
-        self._existing_titles = set()
-        self._course_metadata = {}
+        self._titles = []           # Insertion-ordered titles, returned as a copy
+        self._course_metadata = {}  # Title -> course, also the membership index
         self._content_chunks = []
     
     def search(self, query: str, course_name=None, lesson_number=None, limit=None):
@@ -105,51 +185,48 @@ class MockVectorStoreFixed:
         
         # Handle None query (FIXED)
         if query is None:
-            return SearchResults.empty("Query cannot be None")
+            return SearchResults.empty(_SEARCH_ERR_QUERY_NONE)
         
-        if not isinstance(query, str):
-            return SearchResults.empty(f"Query must be string, got {type(query).__name__}")
+        if type(query) is not str:
+            return SearchResults.empty(_type_error(_MOCK_ERR_QUERY_TYPE, query))
         
         self.last_query = query
         self.last_filters = {'course_name': course_name, 'lesson_number': lesson_number}
         
-        # Return different results based on the query
-        if "no results" in query.lower():
-            return SearchResults(documents=[], metadata=[], distances=[])
+        # Return different results based on the query; when several keywords
+        # appear, "no results" beats "error", which beats a content hit
+        tags = {self._KEYWORDS[match.lower()] for match in self._KEYWORD_RE.findall(query)}
+        if "empty" in tags:
+            return _MOCK_EMPTY
         
-        if "error" in query.lower():
-            return SearchResults.empty("Mock search error")
+        if "error" in tags:
+            return _MOCK_ERROR
         
         # Return mock course content
-        if any(term in query.lower() for term in ["python", "introduction", "lesson"]):
-            return SearchResults(
-                documents=[
-                    "Python is a programming language used for data science and web development.",
-                    "This lesson covers basic Python syntax and variables."
-                ],
-                metadata=[
-                    {"course_title": "Python Fundamentals", "lesson_number": 1, "lesson_title": "Introduction to Python"},
-                    {"course_title": "Python Fundamentals", "lesson_number": 2, "lesson_title": "Variables and Data Types"}
-                ],
-                distances=[0.2, 0.3]
-            )
+        if "hit" in tags:
+            return _MOCK_PYTHON_HIT
         
         # Return empty results for unknown queries
-        return SearchResults(documents=[], metadata=[], distances=[])
+        return _MOCK_EMPTY
     
     def get_existing_course_titles(self) -> list:
         """FIXED: Added missing method"""
-        return list(self._existing_titles)
+        return list(self._titles)
+    
+    def has_title(self, title: str) -> bool:
+        """Check whether a course title has been added"""
+        return title in self._course_metadata
     
     def clear_all_data(self):
         """FIXED: Added missing method"""
-        self._existing_titles.clear()
+        self._titles.clear()
         self._course_metadata.clear()
         self._content_chunks.clear()
     
     def add_course_metadata(self, course):
         """FIXED: Track added courses"""
-        self._existing_titles.add(course.title)
+        if course.title not in self._course_metadata:
+            self._titles.append(course.title)
         self._course_metadata[course.title] = course
     
     def add_course_content(self, chunks):
@@ -158,7 +235,7 @@ class MockVectorStoreFixed:
     
     def get_course_count(self) -> int:
         """Added for completeness"""
-        return len(self._existing_titles)
+        return len(self._titles)
 
 
 # Fix 4: Vector store input validation
@@ -170,53 +247,147 @@ def search_fixed(self,
                limit: Optional[int] = None) -> SearchResults:
     """
     FIXED VERSION: Main search interface with input validation
-    """
-    
-    # INPUT VALIDATION (NEW)
-    if query is None:
-        return SearchResults.empty("Query cannot be None")
-    
-    if not isinstance(query, str):
-        return SearchResults.empty(f"Query must be a string, got {type(query).__name__}")
     
-    if not query.strip():
-        return SearchResults.empty("Query cannot be empty")
-    
-    # PARAMETER VALIDATION (NEW) 
-    if course_name is not None and not isinstance(course_name, str):
-        return SearchResults.empty(f"Course name must be a string, got {type(course_name).__name__}")
-    
-    if lesson_number is not None and not isinstance(lesson_number, int):
-        return SearchResults.empty(f"Lesson number must be an integer, got {type(lesson_number).__name__}")
-    
-    if limit is not None and (not isinstance(limit, int) or limit <= 0):
-        return SearchResults.empty("Limit must be a positive integer")
+    A bad argument is raised as TypeError or ValueError for the caller to
+    report. Blank queries and string or bool lesson numbers would otherwise
+    search successfully and match the wrong chunks, so they are rejected
+    before any embedding work.
+    """
+    _raise_for_invalid_args(query, course_name, lesson_number, limit)
+    try:
+        return _search_unchecked(self, query, course_name, lesson_number, limit)
+    except Exception as e:
+        return SearchResults.empty(f"Search error: {str(e)}")
+
+
+def _search_unchecked(self, query, course_name, lesson_number, limit) -> SearchResults:
+    """Body of search_fixed; errors propagate to its handler"""
+    # Identical searches skip name resolution, embedding and the ANN query (NEW).
+    # The generation is bumped whenever stored data changes (see Fix 5)
+    search_limit = limit if limit is not None else self.max_results
+    cache_key = (query, course_name, lesson_number, search_limit, self._cache_generation)
+    cached = self._search_cache.get(cache_key)
+    if cached is not None:
+        return cached
     
     # Step 1: Resolve course name if provided
     course_title = None
     if course_name:
-        try:
-            course_title = self._resolve_course_name(course_name)
-            if not course_title:
-                return SearchResults.empty(f"No course found matching '{course_name}'")
-        except Exception as e:
-            return SearchResults.empty(f"Error resolving course name: {str(e)}")
+        course_title = self._resolve_course_name(course_name)
+        if not course_title:
+            return SearchResults.empty(f"No course found matching '{course_name}'")
     
     # Step 2: Build filter for content search
     filter_dict = self._build_filter(course_title, lesson_number)
     
-    # Step 3: Search course content
-    search_limit = limit if limit is not None else self.max_results
+    # Step 3: Embed once; paraphrases of an earlier search reuse its results (NEW).
+    # Numbers in the query join the filters in the exact part of the key, since
+    # embeddings barely separate "lesson 1 intro" from "lesson 2 intro"
+    space = (course_title, lesson_number, search_limit, tuple(_NUMBER_RE.findall(query)))
+    embedding = np.asarray(self.embedding_function([query])[0], dtype=np.float32)
     
-    try:
-        results = self.course_content.query(
-            query_texts=[query],
+    results = self._semantic_cache.get(space, embedding)
+    if results is None:
+        # Step 4: Search course content with the embedding computed above
+        results = SearchResults.from_chroma(self.course_content.query(
+            query_embeddings=[embedding.tolist()],
             n_results=search_limit,
             where=filter_dict
-        )
-        return SearchResults.from_chroma(results)
-    except Exception as e:
-        return SearchResults.empty(f"Search error: {str(e)}")
+        ))
+        self._semantic_cache.put(space, embedding, results)
+    
+    # Only successful searches are cached; errors may be transient
+    self._search_cache.put(cache_key, results)
+    return results
+
+
+def _raise_for_invalid_args(query, course_name, lesson_number, limit):
+    """Raise for the first invalid search argument, if any
+    
+    Exact type checks keep it cheap and also reject bools, which would
+    pass an isinstance(..., int) check.
+    """
+    if query is None:
+        raise TypeError(_SEARCH_ERR_QUERY_NONE)
+    
+    if type(query) is not str:
+        raise TypeError(_type_error(_SEARCH_ERR_QUERY_TYPE, query))
+    
+    if not query or query.isspace():
+        raise ValueError(_SEARCH_ERR_QUERY_EMPTY)
+    
+    if course_name is not None and type(course_name) is not str:
+        raise TypeError(_type_error(_SEARCH_ERR_COURSE_TYPE, course_name))
+    
+    if lesson_number is not None and type(lesson_number) is not int:
+        raise TypeError(_type_error(_SEARCH_ERR_LESSON_TYPE, lesson_number))
+    
+    if limit is not None and (type(limit) is not int or limit <= 0):
+        raise ValueError(_SEARCH_ERR_LIMIT)
+
+
+# Fix 5: Search result caches for Fix 4
+# File: vector_store.py (VectorStore.__init__ and the methods that write data)
+#
+# In __init__:
+#     self._search_cache = ResponseCache(maxsize=1024)  # from search_tools
+#     self._semantic_cache = SemanticSearchCache()
+#     self._cache_generation = 0
+#
+# Call this at the end of add_course_metadata, add_course_content and
+# clear_all_data so cached results never outlive the data they came from.
+def invalidate_search_cache(self):
+    """Drop cached search results after the stored courses change"""
+    self._cache_generation += 1
+    self._search_cache.clear()
+    self._semantic_cache.clear()
+
+
+class SemanticSearchCache:
+    """Serve near-duplicate searches by cosine similarity of query embeddings"""
+    
+    def __init__(self, threshold: float = 0.95, maxsize: int = 512, ttl: float = 3600.0):
+        self.threshold = threshold
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # Filter key -> [unit embeddings (maxsize, d), insert times, results, next slot]
+        self._spaces = {}
+    
+    def get(self, space, embedding: np.ndarray) -> Optional[SearchResults]:
+        """Return results of the most similar fresh search above the threshold"""
+        entry = self._spaces.get(space)
+        if entry is None:
+            return None
+        
+        matrix, created, results, _ = entry
+        # One matrix-vector product scores every cached query; unused or
+        # expired slots are excluded through their insert time
+        sims = matrix @ (embedding / np.linalg.norm(embedding))
+        sims[created < time.monotonic() - self.ttl] = -1.0
+        best = int(sims.argmax())
+        return results[best] if sims[best] >= self.threshold else None
+    
+    def put(self, space, embedding: np.ndarray, result: SearchResults):
+        """Store results, overwriting the oldest slot once the space is full"""
+        entry = self._spaces.get(space)
+        if entry is None:
+            entry = [
+                np.zeros((self.maxsize, embedding.shape[0]), dtype=np.float32),
+                np.full(self.maxsize, -np.inf),
+                [None] * self.maxsize,
+                0
+            ]
+            self._spaces[space] = entry
+        
+        slot = entry[3]
+        entry[0][slot] = embedding / np.linalg.norm(embedding)
+        entry[1][slot] = time.monotonic()
+        entry[2][slot] = result
+        entry[3] = (slot + 1) % self.maxsize
+    
+    def clear(self):
+        """Drop all cached searches"""
+        self._spaces.clear()
 
 
 # Usage Instructions:
@@ -225,8 +396,10 @@ To implement these fixes:
 
 1. Apply Fix 1 to search_tools.py:52 (CourseSearchTool.execute method)
 2. Apply Fix 2 to search_tools.py:261 (ToolManager.execute_tool method) 
+   and Fix 2b to ToolManager.register_tool, adding _refresh_tools_list
 3. Apply Fix 3 to test_helpers.py (replace MockVectorStore class)
 4. Apply Fix 4 to vector_store.py:61 (VectorStore.search method)
+5. Apply Fix 5 to vector_store.py (cache setup and invalidation for Fix 4)
 
 After applying fixes, run tests again to verify 98%+ success rate.
 """
\ No newline at end of file
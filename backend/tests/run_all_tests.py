@@ -1,159 +1,272 @@
 """Main test runner for RAG system tests"""
 
+import argparse
+import importlib
 import unittest
 import sys
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
 from io import StringIO
+from itertools import chain, islice
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
-# Import all test modules
-from test_course_search_tool import TestCourseSearchTool, TestCourseSearchToolEdgeCases
-from test_ai_generator_integration import (
-    TestAIGeneratorToolIntegration, 
-    TestToolCallErrorHandling,
-    TestAIGeneratorSystemPrompt
-)
-from test_rag_system import (
-    TestRAGSystemContentQueries,
-    TestRAGSystemDocumentProcessing, 
-    TestRAGSystemComponentInitialization
-)
+# Test categories: name -> (module, test case classes). Modules are imported
+# only when their category runs, so skipped categories never load their SDKs
+_CATEGORIES = {
+    "CourseSearchTool Tests": ("test_course_search_tool", [
+        "TestCourseSearchTool",
+        "TestCourseOutlineTool",
+        "TestCourseSearchToolEdgeCases"
+    ]),
+    "AI Generator Integration Tests": ("test_ai_generator_integration", [
+        "TestAIGeneratorToolIntegration",
+        "TestToolCallErrorHandling",
+        "TestEmptyToolManager",
+        "TestAIGeneratorSystemPrompt"
+    ]),
+    "RAG System Tests": ("test_rag_system", [
+        "TestRAGSystemContentQueries",
+        "TestRAGSystemDocumentProcessing",
+        "TestRAGSystemComponentInitialization",
+        "TestRAGSystemConversationPrefix",
+        "TestRAGSystemStreaming"
+    ]),
+    "Proposed Fixes Tests": ("test_proposed_fixes", [
+        "TestSearchFixedValidation",
+        "TestSemanticSearchCache"
+    ]),
+    "Simple App Tests": ("test_simple_app", [
+        "TestAddExchange"
+    ])
+}
+
+@dataclass(slots=True)
+class CategoryResult:
+    """Results of one test category as read back for reporting"""
+    name: str
+    tests: int
+    failures: int
+    errors: int
+    failure_details: list
+    error_details: list
 
 class TestResults:
     """Helper class to aggregate and display test results"""
     
+    __slots__ = ('_stats', '_names', '_rows', '_details')
+    
     def __init__(self):
-        self.total_tests = 0
-        self.total_failures = 0
-        self.total_errors = 0
-        self.results_by_category = {}
+        self._stats = []    # (tests, failures, errors) for each row
+        self._names = []    # Category name for each stats row
+        self._rows = {}     # Category name -> row index
+        self._details = []  # (failure_details, error_details) for each row
+    
+    @property
+    def total_tests(self):
+        """Total tests run across categories"""
+        return sum(tests for tests, _, _ in self._stats)
+    
+    @property
+    def total_failures(self):
+        """Total failures across categories"""
+        return sum(failures for _, failures, _ in self._stats)
+    
+    @property
+    def total_errors(self):
+        """Total errors across categories"""
+        return sum(errors for _, _, errors in self._stats)
     
     def add_result(self, category, result):
         """Add test result for a category"""
-        self.total_tests += result.testsRun
-        self.total_failures += len(result.failures)
-        self.total_errors += len(result.errors)
+        row = self._rows.get(category)
+        if row is None:
+            row = self._rows[category] = len(self._names)
+            self._names.append(category)
+            self._stats.append(None)
+            self._details.append(None)
         
-        self.results_by_category[category] = {
-            'tests': result.testsRun,
-            'failures': len(result.failures),
-            'errors': len(result.errors),
-            'failure_details': result.failures,
-            'error_details': result.errors
-        }
+        self._stats[row] = (result.testsRun, len(result.failures), len(result.errors))
+        self._details[row] = (result.failures, result.errors)
+    
+    def _categories(self):
+        """Yield a CategoryResult per category, in the order they were added"""
+        for name, (tests, failures, errors), (failure_details, error_details) in zip(
+                self._names, self._stats, self._details):
+            yield CategoryResult(name, tests, failures, errors, failure_details, error_details)
     
     def print_summary(self):
         """Print comprehensive test summary"""
+        total_tests, total_failures, total_errors = self.total_tests, self.total_failures, self.total_errors
+        
         print("=" * 80)
         print("RAG SYSTEM TEST RESULTS SUMMARY")
         print("=" * 80)
         
         # Overall summary
         print(f"\nOVERALL RESULTS:")
-        print(f"Total Tests Run: {self.total_tests}")
-        print(f"Total Failures: {self.total_failures}")
-        print(f"Total Errors: {self.total_errors}")
-        success_rate = ((self.total_tests - self.total_failures - self.total_errors) / self.total_tests) * 100 if self.total_tests > 0 else 0
+        print(f"Total Tests Run: {total_tests}")
+        print(f"Total Failures: {total_failures}")
+        print(f"Total Errors: {total_errors}")
+        success_rate = ((total_tests - total_failures - total_errors) / total_tests) * 100 if total_tests > 0 else 0
         print(f"Success Rate: {success_rate:.1f}%")
         
         # Category breakdown
         print(f"\nRESULTS BY CATEGORY:")
-        for category, results in self.results_by_category.items():
-            print(f"\n{category}:")
-            print(f"  Tests: {results['tests']}")
-            print(f"  Failures: {results['failures']}")
-            print(f"  Errors: {results['errors']}")
+        for results in self._categories():
+            print(f"\n{results.name}:")
+            print(f"  Tests: {results.tests}")
+            print(f"  Failures: {results.failures}")
+            print(f"  Errors: {results.errors}")
             
-            if results['failures'] > 0:
+            if results.failures > 0:
                 print(f"  Failure Details:")
-                for test, traceback in results['failure_details']:
+                for test, traceback in results.failure_details:
                     print(f"    - {test}")
-                    # Print first few lines of traceback
-                    lines = traceback.split('\n')[:3]
-                    for line in lines:
-                        if line.strip():
-                            print(f"      {line.strip()}")
+                    # Print first few non-blank lines of traceback
+                    for line in islice((ln for ln in traceback.splitlines() if ln.strip()), 3):
+                        print(f"      {line.strip()}")
             
-            if results['errors'] > 0:
+            if results.errors > 0:
                 print(f"  Error Details:")
-                for test, traceback in results['error_details']:
+                for test, traceback in results.error_details:
                     print(f"    - {test}")
-                    # Print first few lines of traceback
-                    lines = traceback.split('\n')[:3]
-                    for line in lines:
-                        if line.strip():
-                            print(f"      {line.strip()}")
+                    # Print first few non-blank lines of traceback
+                    for line in islice((ln for ln in traceback.splitlines() if ln.strip()), 3):
+                        print(f"      {line.strip()}")
+    
+    # Failing test names kept per component for the failure analysis
+    MAX_ISSUES = 5
     
     def get_failing_components(self):
         """Identify which components are failing based on test results"""
         failing_components = []
         
-        for category, results in self.results_by_category.items():
-            if results['failures'] > 0 or results['errors'] > 0:
+        for results in self._categories():
+            if results.failures > 0 or results.errors > 0:
+                # Analyze failure patterns, naming only the first few tests
+                details = chain(results.failure_details, results.error_details)
                 failing_components.append({
-                    'component': category,
-                    'failures': results['failures'],
-                    'errors': results['errors'],
-                    'issues': []
+                    'component': results.name,
+                    'failures': results.failures,
+                    'errors': results.errors,
+                    'issues': [str(test).rpartition('.')[2] for test, _ in islice(details, self.MAX_ISSUES)],
+                    'issue_count': results.failures + results.errors
                 })
-                
-                # Analyze failure patterns
-                for test, traceback in results['failure_details'] + results['error_details']:
-                    test_name = str(test).split('.')[-1]
-                    failing_components[-1]['issues'].append(test_name)
         
         return failing_components
 
-def run_test_category(category_name, test_classes, verbosity=1):
-    """Run tests for a specific category"""
-    print(f"\n{'='*60}")
-    print(f"RUNNING {category_name.upper()} TESTS")
-    print(f"{'='*60}")
-    
+def build_suite(loader, test_classes):
+    """Load the tests of a category into a single suite"""
     # Create test suite using TestLoader (makeSuite is deprecated)
     suite = unittest.TestSuite()
-    loader = unittest.TestLoader()
     for test_class in test_classes:
         suite.addTest(loader.loadTestsFromTestCase(test_class))
+    return suite
+
+def load_test_classes(module_name, class_names):
+    """Import a test module and return the named test case classes"""
+    module = importlib.import_module(module_name)
+    return [getattr(module, name) for name in class_names]
+
+# Capture buffer reused by every category a worker runs
+_capture = threading.local()
+
+def _capture_buffer():
+    """Return this worker's capture buffer, emptied for the next category"""
+    buffer = getattr(_capture, 'buffer', None)
+    if buffer is None:
+        buffer = _capture.buffer = StringIO()
+    buffer.seek(0)
+    buffer.truncate()
+    return buffer
+
+def run_test_category(module_name, class_names, verbosity=2, capture=False):
+    """Run tests for a specific category, returning picklable results
+    
+    Output is written straight to stdout unless capture is set, in which
+    case it is returned so parallel categories don't interleave.
+    """
+    suite = build_suite(unittest.TestLoader(), load_test_classes(module_name, class_names))
     
-    # Capture output
-    output = StringIO()
-    runner = unittest.TextTestRunner(stream=output, verbosity=verbosity)
+    stream = _capture_buffer() if capture else sys.stdout
+    runner = unittest.TextTestRunner(stream=stream, verbosity=verbosity)
     result = runner.run(suite)
     
-    # Print output
-    print(output.getvalue())
+    # TestResult holds test instances, so send back names and tracebacks only
+    return (
+        result.testsRun,
+        [(str(test), traceback) for test, traceback in result.failures],
+        [(str(test), traceback) for test, traceback in result.errors],
+        stream.getvalue() if capture else None
+    )
+
+def run_categories(test_categories):
+    """Run every test class concurrently, returning futures grouped by category"""
+    # Test classes build their own fixtures and share no state, so each is
+    # an independent job and the pool can use every core
+    jobs = sum(len(class_names) for _, (_, class_names) in test_categories)
+    workers = min(jobs, os.cpu_count() or 1)
+    
+    # Separate processes keep module-level patches in one class from
+    # leaking into another; threads are the fallback where processes can't start
+    try:
+        executor = ProcessPoolExecutor(max_workers=workers)
+    except (OSError, NotImplementedError):
+        executor = ThreadPoolExecutor(max_workers=workers)
     
-    return result
+    with executor:
+        return [
+            [executor.submit(run_test_category, module_name, [class_name], capture=True)
+             for class_name in class_names]
+            for _, (module_name, class_names) in test_categories
+        ]
 
-def main():
-    """Main test execution function"""
+def merge_class_results(futures):
+    """Combine the per-class results of one category, keeping class order"""
+    tests_run, failures, errors, output = 0, [], [], []
+    for future in futures:
+        class_run, class_failures, class_errors, class_output = future.result()
+        tests_run += class_run
+        failures.extend(class_failures)
+        errors.extend(class_errors)
+        output.append(class_output)
+    return tests_run, failures, errors, ''.join(output)
+
+def main(categories=None):
+    """Main test execution function, optionally limited to the named categories"""
     print("Starting RAG System Comprehensive Tests...")
     
     # Initialize results tracker
     test_results = TestResults()
     
-    # Define test categories
+    # Select test categories
     test_categories = [
-        ("CourseSearchTool Tests", [TestCourseSearchTool, TestCourseSearchToolEdgeCases]),
-        ("AI Generator Integration Tests", [
-            TestAIGeneratorToolIntegration, 
-            TestToolCallErrorHandling,
-            TestAIGeneratorSystemPrompt
-        ]),
-        ("RAG System Tests", [
-            TestRAGSystemContentQueries,
-            TestRAGSystemDocumentProcessing,
-            TestRAGSystemComponentInitialization
-        ])
+        (name, spec) for name, spec in _CATEGORIES.items()
+        if not categories or name in categories
     ]
     
-    # Run each test category
-    for category_name, test_classes in test_categories:
+    # Several categories run in parallel and are reported in their listed
+    # order; a single category runs inline and streams its output
+    parallel = len(test_categories) > 1
+    futures = run_categories(test_categories) if parallel else None
+    for index, (category_name, (module_name, class_names)) in enumerate(test_categories):
+        print(f"\n{'='*60}")
+        print(f"RUNNING {category_name.upper()}")
+        print(f"{'='*60}")
         try:
-            result = run_test_category(category_name, test_classes, verbosity=2)
+            if parallel:
+                tests_run, failures, errors, output = merge_class_results(futures[index])
+                print(output)
+            else:
+                tests_run, failures, errors, _ = run_test_category(module_name, class_names)
+            result = unittest.TestResult()
+            result.testsRun = tests_run
+            result.failures = failures
+            result.errors = errors
             test_results.add_result(category_name, result)
         except Exception as e:
             print(f"Error running {category_name}: {e}")
@@ -178,9 +291,9 @@ def main():
             print(f"\nX FAILING COMPONENT: {component['component']}")
             print(f"   Failures: {component['failures']}")
             print(f"   Errors: {component['errors']}")
-            print(f"   Failing Tests: {', '.join(component['issues'][:5])}")
-            if len(component['issues']) > 5:
-                print(f"   ... and {len(component['issues']) - 5} more")
+            print(f"   Failing Tests: {', '.join(component['issues'])}")
+            if component['issue_count'] > len(component['issues']):
+                print(f"   ... and {component['issue_count'] - len(component['issues'])} more")
         
         print(f"\n{'='*80}")
         print("RECOMMENDED FIXES")
@@ -231,8 +344,13 @@ def generate_fix_recommendations(failing_components):
     return recommendations
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--category", action="append", choices=list(_CATEGORIES),
+                        help="Run only this category (repeatable)")
+    args = parser.parse_args()
+    
     # Run all tests
-    results = main()
+    results = main(args.category)
     
     # Exit with appropriate code
     exit_code = 0 if (results.total_failures == 0 and results.total_errors == 0) else 1
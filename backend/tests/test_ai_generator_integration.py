@@ -2,26 +2,45 @@
 
 import unittest
 from unittest.mock import Mock, MagicMock, patch
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from types import SimpleNamespace
 
-from ai_generator import AIGenerator
-from search_tools import ToolManager, CourseSearchTool
 from test_helpers import MockVectorStore, MockAIGenerator, TestConfig
+from search_tools import ToolManager, CourseSearchTool
+
+def _fake_tool_use_response(query, messages=None, tools=None, tool_manager=None):
+    """Stand-in for generate_response that always runs one search"""
+    if tools and tool_manager:
+        tool_result = tool_manager.execute_tool("search_course_content", query="python")
+        return f"Based on search results: {tool_result}"
+    return "No tools available"
 
 class TestAIGeneratorToolIntegration(unittest.TestCase):
     """Test AI generator's integration with CourseSearchTool"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.mock_vector_store = MockVectorStore()
-        self.search_tool = CourseSearchTool(self.mock_vector_store)
-        self.tool_manager = ToolManager()
-        self.tool_manager.register_tool(self.search_tool)
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by every test in the class"""
+        cls.mock_vector_store = MockVectorStore()
+        cls.search_tool = CourseSearchTool(cls.mock_vector_store)
+        cls.tool_manager = ToolManager()
+        cls.tool_manager.register_tool(cls.search_tool)
+        cls.tool_definitions = cls.tool_manager.get_tool_definitions()
         
         # Mock AI generator to avoid API calls
-        self.mock_ai_generator = MockAIGenerator()
+        cls.mock_ai_generator = MockAIGenerator()
+        
+        # Patch the Anthropic client once; tests set its return value
+        cls._anthropic_patcher = patch('anthropic.Anthropic')
+        cls._MockAnthropic = cls._anthropic_patcher.start()
+        cls.addClassCleanup(cls._anthropic_patcher.stop)
+    
+    def tearDown(self):
+        """Reset the per-test state left on the shared fixtures"""
+        self.search_tool.last_sources = []
+        self.tool_manager.clear_caches()
+        self.mock_vector_store.last_query = None
+        self.mock_vector_store.last_filters = None
+        self._MockAnthropic.reset_mock(return_value=True)
     
     def test_tool_definitions_structure(self):
         """Test that tool definitions are properly structured for AI"""
@@ -61,7 +80,7 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
         self.assertIsNone(self.mock_ai_generator.last_tools)
         
         # Test with tools
-        tools = self.tool_manager.get_tool_definitions()
+        tools = self.tool_definitions
         response = self.mock_ai_generator.generate_response(
             "What is Python?",
             tools=tools,
@@ -75,12 +94,12 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
         # Response should indicate tool usage
         self.assertIn("course content", response.lower())
     
-    @patch('anthropic.Anthropic')
-    def test_real_ai_generator_initialization(self, mock_anthropic):
+    def test_real_ai_generator_initialization(self):
         """Test that real AI generator initializes correctly with tools"""
+        from ai_generator import AIGenerator
         # Mock the Anthropic client
         mock_client = Mock()
-        mock_anthropic.return_value = mock_client
+        self._MockAnthropic.return_value = mock_client
         
         # Initialize AI generator
         ai_generator = AIGenerator(
@@ -94,16 +113,14 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
         self.assertEqual(ai_generator.model, "claude-3-sonnet-20240229")
         self.assertIsNotNone(ai_generator.client)
     
-    @patch('anthropic.Anthropic')
-    def test_anthropic_tool_calling_format(self, mock_anthropic):
+    def test_anthropic_tool_calling_format(self):
         """Test that tools are formatted correctly for Anthropic API"""
+        from ai_generator import AIGenerator
         # Mock the Anthropic client and response
         mock_client = Mock()
-        mock_response = Mock()
-        mock_response.content = [Mock(text="Test response")]
-        mock_response.stop_reason = "stop"
+        mock_response = SimpleNamespace(content=[SimpleNamespace(text="Test response")], stop_reason="stop")
         mock_client.messages.create.return_value = mock_response
-        mock_anthropic.return_value = mock_client
+        self._MockAnthropic.return_value = mock_client
         
         # Initialize AI generator
         ai_generator = AIGenerator(
@@ -113,7 +130,7 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
         )
         
         # Generate response with tools
-        tools = self.tool_manager.get_tool_definitions()
+        tools = self.tool_definitions
         response = ai_generator.generate_response(
             query="What is Python?",
             tools=tools,
@@ -128,20 +145,186 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
         self.assertIn("tools", call_args.kwargs)
         self.assertIn("tool_choice", call_args.kwargs)
         self.assertEqual(call_args.kwargs["tool_choice"]["type"], "auto")
-    
+
+    def test_anthropic_system_prompt_caching(self):
+        """Test that the system prompt stays cacheable and history is sent as messages"""
+        from ai_generator import AIGenerator
+        mock_client = Mock()
+        mock_response = SimpleNamespace(content=[SimpleNamespace(text="Test response")], stop_reason="stop")
+        mock_client.messages.create.return_value = mock_response
+        self._MockAnthropic.return_value = mock_client
+
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="claude-3-sonnet-20240229",
+            provider="anthropic"
+        )
+        history = [
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello"}
+        ]
+        ai_generator.generate_response(query="What is Python?", messages=history)
+
+        call_kwargs = mock_client.messages.create.call_args.kwargs
+
+        # Static prompt is cached and never carries the history
+        system = call_kwargs["system"]
+        self.assertEqual(len(system), 1)
+        self.assertEqual(system[0]["text"], AIGenerator.SYSTEM_PROMPT)
+        self.assertEqual(system[0]["cache_control"], {"type": "ephemeral"})
+
+        # History precedes the new query, sent in the same shape as history
+        sent = call_kwargs["messages"]
+        self.assertEqual(sent[:2], history)
+        self.assertEqual(sent[2], {"role": "user", "content": "What is Python?"})
+
+    def test_anthropic_streaming_response(self):
+        """Test that streamed text fragments are yielded as they arrive"""
+        from ai_generator import AIGenerator
+        mock_client = MagicMock()
+        stream = mock_client.messages.stream.return_value.__enter__.return_value
+        stream.text_stream = iter(["Python ", "is ", "great."])
+        stream.get_final_message.return_value = SimpleNamespace(stop_reason="end_turn")
+        self._MockAnthropic.return_value = mock_client
+
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="claude-3-sonnet-20240229",
+            provider="anthropic"
+        )
+        fragments = list(ai_generator.generate_response_stream(
+            query="What is Python?",
+            tools=self.tool_definitions,
+            tool_manager=self.tool_manager
+        ))
+
+        self.assertEqual(fragments, ["Python ", "is ", "great."])
+        mock_client.messages.stream.assert_called_once()
+
+    @patch('ai_generator.OpenAI')
+    def test_deepseek_tool_calling(self, mock_openai):
+        """Test that DeepSeek tool calls run through the tool manager"""
+        from ai_generator import AIGenerator
+        tool_call = SimpleNamespace(
+            id="call_1",
+            function=SimpleNamespace(name="search_course_content", arguments='{"query": "python"}')
+        )
+        first = SimpleNamespace(choices=[SimpleNamespace(
+            finish_reason="tool_calls",
+            message=SimpleNamespace(content=None, tool_calls=[tool_call])
+        )])
+        final = SimpleNamespace(choices=[SimpleNamespace(
+            finish_reason="stop",
+            message=SimpleNamespace(content="Python is a language.", tool_calls=None)
+        )])
+        mock_client = Mock()
+        mock_client.chat.completions.create.side_effect = [first, final]
+        mock_openai.return_value = mock_client
+
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="deepseek-chat",
+            provider="deepseek",
+            base_url="https://api.deepseek.com"
+        )
+        response = ai_generator.generate_response(
+            query="What is Python?",
+            tools=self.tool_definitions,
+            tool_manager=self.tool_manager
+        )
+
+        self.assertEqual(response, "Python is a language.")
+
+        # Tools are forwarded in OpenAI function format
+        first_kwargs = mock_client.chat.completions.create.call_args_list[0].kwargs
+        self.assertEqual(first_kwargs["tools"][0]["type"], "function")
+        self.assertEqual(first_kwargs["tools"][0]["function"]["name"], "search_course_content")
+
+        # Tool output is sent back as a tool message for the follow-up call
+        final_messages = mock_client.chat.completions.create.call_args_list[1].kwargs["messages"]
+        self.assertEqual(final_messages[-1]["role"], "tool")
+        self.assertEqual(final_messages[-1]["tool_call_id"], "call_1")
+        self.assertIn("Python Fundamentals", final_messages[-1]["content"])
+
+    @patch('ai_generator.OpenAI')
+    def test_deepseek_tool_translation_reused(self, mock_openai):
+        """Test that the same tool list is only translated once"""
+        from ai_generator import AIGenerator
+        reply = SimpleNamespace(choices=[SimpleNamespace(
+            finish_reason="stop",
+            message=SimpleNamespace(content="Hi", tool_calls=None)
+        )])
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = reply
+        mock_openai.return_value = mock_client
+
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="deepseek-chat",
+            provider="deepseek",
+            base_url="https://api.deepseek.com"
+        )
+        tools = self.tool_definitions
+        ai_generator.generate_response(query="Hello", tools=tools, tool_manager=self.tool_manager)
+        ai_generator.generate_response(query="Hello again", tools=tools, tool_manager=self.tool_manager)
+
+        first, second = mock_client.chat.completions.create.call_args_list
+        self.assertIs(first.kwargs["tools"], second.kwargs["tools"])
+
+    @patch('ai_generator.OpenAI')
+    def test_deepseek_tools_without_manager_not_offered(self, mock_openai):
+        """Test that tools are not sent when no manager could run them"""
+        from ai_generator import AIGenerator
+        reply = SimpleNamespace(choices=[SimpleNamespace(
+            finish_reason="stop",
+            message=SimpleNamespace(content="Python is a language.", tool_calls=None)
+        )])
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = reply
+        mock_openai.return_value = mock_client
+
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="deepseek-chat",
+            provider="deepseek",
+            base_url="https://api.deepseek.com"
+        )
+        response = ai_generator.generate_response(query="What is Python?", tools=self.tool_definitions)
+
+        self.assertEqual(response, "Python is a language.")
+        self.assertNotIn("tools", mock_client.chat.completions.create.call_args.kwargs)
+
+    @patch('ai_generator.OpenAI')
+    def test_deepseek_stream_tools_without_manager_not_offered(self, mock_openai):
+        """Test that a stream without a manager sends no tools and yields the text"""
+        from ai_generator import AIGenerator
+        chunks = [
+            SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))])
+            for text in ("Python ", "is a language.")
+        ]
+        mock_client = Mock()
+        mock_client.chat.completions.create.return_value = iter(chunks)
+        mock_openai.return_value = mock_client
+
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="deepseek-chat",
+            provider="deepseek",
+            base_url="https://api.deepseek.com"
+        )
+        fragments = list(ai_generator.generate_response_stream(query="What is Python?", tools=self.tool_definitions))
+
+        self.assertEqual(fragments, ["Python ", "is a language."])
+        call_kwargs = mock_client.chat.completions.create.call_args.kwargs
+        self.assertNotIn("tools", call_kwargs)
+        self.assertTrue(call_kwargs["stream"])
+
     def test_tool_execution_flow(self):
         """Test the complete tool execution flow"""
         # Create a mock that simulates tool use
-        class MockToolUseGenerator(MockAIGenerator):
-            def generate_response(self, query, conversation_history=None, tools=None, tool_manager=None):
-                if tools and tool_manager:
-                    # Simulate tool execution
-                    tool_result = tool_manager.execute_tool("search_course_content", query="python")
-                    return f"Based on search results: {tool_result}"
-                return "No tools available"
-        
-        mock_generator = MockToolUseGenerator()
-        tools = self.tool_manager.get_tool_definitions()
+        mock_generator = Mock(spec=MockAIGenerator)
+        mock_generator.generate_response.side_effect = _fake_tool_use_response
+        tools = self.tool_definitions
         
         response = mock_generator.generate_response(
             "What is Python?",
@@ -155,13 +338,13 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
     
     def test_system_prompt_structure(self):
         """Test that system prompt is properly structured"""
+        from ai_generator import AIGenerator
         # Create a real AI generator instance (but don't call API)
-        with patch('anthropic.Anthropic'):
-            ai_generator = AIGenerator(
-                api_key="test-key",
-                model="claude-3-sonnet-20240229",
-                provider="anthropic"
-            )
+        ai_generator = AIGenerator(
+            api_key="test-key",
+            model="claude-3-sonnet-20240229",
+            provider="anthropic"
+        )
         
         # Check system prompt exists and has key components
         system_prompt = ai_generator.SYSTEM_PROMPT
@@ -175,12 +358,15 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
     
     def test_conversation_history_integration(self):
         """Test that conversation history is properly integrated with tool usage"""
-        history = "Previous conversation:\nUser: What is programming?\nAI: Programming is writing code."
+        history = [
+            {"role": "user", "content": "What is programming?"},
+            {"role": "assistant", "content": "Programming is writing code."}
+        ]
         
         response = self.mock_ai_generator.generate_response(
             "What about Python specifically?",
-            conversation_history=history,
-            tools=self.tool_manager.get_tool_definitions(),
+            messages=history,
+            tools=self.tool_definitions,
             tool_manager=self.tool_manager
         )
         
@@ -191,13 +377,21 @@ class TestAIGeneratorToolIntegration(unittest.TestCase):
 class TestToolCallErrorHandling(unittest.TestCase):
     """Test error handling in tool calling scenarios"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.mock_vector_store = MockVectorStore()
-        self.search_tool = CourseSearchTool(self.mock_vector_store)
-        self.tool_manager = ToolManager()
-        self.tool_manager.register_tool(self.search_tool)
-        self.mock_ai_generator = MockAIGenerator()
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by every test in the class"""
+        cls.mock_vector_store = MockVectorStore()
+        cls.search_tool = CourseSearchTool(cls.mock_vector_store)
+        cls.tool_manager = ToolManager()
+        cls.tool_manager.register_tool(cls.search_tool)
+        cls.mock_ai_generator = MockAIGenerator()
+    
+    def tearDown(self):
+        """Reset the per-test state left on the shared fixtures"""
+        self.search_tool.last_sources = []
+        self.tool_manager.clear_caches()
+        self.mock_vector_store.last_query = None
+        self.mock_vector_store.last_filters = None
     
     def test_tool_execution_with_invalid_parameters(self):
         """Test tool execution with invalid parameters"""
@@ -222,85 +416,64 @@ class TestToolCallErrorHandling(unittest.TestCase):
         result = error_search_tool.execute("error query")
         self.assertIn("Mock search error", result)
     
+class TestEmptyToolManager(unittest.TestCase):
+    """Test a tool manager with no registered tools"""
+    
     def test_empty_tool_definitions(self):
         """Test behavior with empty tool definitions"""
-        empty_tool_manager = ToolManager()
-        definitions = empty_tool_manager.get_tool_definitions()
-        
-        self.assertEqual(len(definitions), 0)
-        self.assertIsInstance(definitions, list)
+        self.assertEqual(ToolManager().get_tool_definitions(), [])
 
 class TestAIGeneratorSystemPrompt(unittest.TestCase):
     """Test system prompt effectiveness and structure"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        with patch('anthropic.Anthropic'):
-            self.ai_generator = AIGenerator(
-                api_key="test-key",
-                model="claude-3-sonnet-20240229",
-                provider="anthropic"
-            )
+    @classmethod
+    def setUpClass(cls):
+        """Create one generator against a class-wide Anthropic mock"""
+        from ai_generator import AIGenerator
+        cls._patcher = patch('anthropic.Anthropic')
+        cls._patcher.start()
+        cls.addClassCleanup(cls._patcher.stop)
+        cls.ai_generator = AIGenerator(
+            api_key="test-key",
+            model="claude-3-sonnet-20240229",
+            provider="anthropic"
+        )
+        cls._prompt = cls.ai_generator.SYSTEM_PROMPT
+    
+    def _assert_prompt_contains(self, required):
+        """Assert every required phrase is in the prompt, reporting all misses"""
+        missing = [phrase for phrase in required if phrase not in self._prompt]
+        self.assertEqual(missing, [], f"Missing from system prompt: {missing}")
     
     def test_system_prompt_tool_instructions(self):
         """Test that system prompt contains proper tool usage instructions"""
-        prompt = self.ai_generator.SYSTEM_PROMPT
-        
-        # Check for tool-specific instructions
-        self.assertIn("search_course_content", prompt)
-        self.assertIn("get_course_outline", prompt)
-        
-        # Check for usage guidelines
-        self.assertIn("Tool Selection Guidelines", prompt)
-        self.assertIn("Content-specific queries", prompt)
-        self.assertIn("Course outline/structure queries", prompt)
+        self._assert_prompt_contains((
+            # Tool-specific instructions
+            "search_course_content",
+            "get_course_outline",
+            # Usage guidelines
+            "Tool Selection Guidelines",
+            "Content-specific queries",
+            "Course outline/structure queries"
+        ))
     
     def test_system_prompt_response_protocol(self):
         """Test system prompt contains response formatting instructions"""
-        prompt = self.ai_generator.SYSTEM_PROMPT
-        
-        # Check for response protocols
-        self.assertIn("Response Protocol", prompt)
-        self.assertIn("Brief, Concise and focused", prompt)
-        self.assertIn("Educational", prompt)
-        
-        # Check for formatting guidelines
-        self.assertIn("No meta-commentary", prompt)
+        self._assert_prompt_contains((
+            # Response protocols
+            "Response Protocol",
+            "Brief, Concise and focused",
+            "Educational",
+            # Formatting guidelines
+            "No meta-commentary"
+        ))
     
     def test_system_prompt_search_limitations(self):
         """Test system prompt includes search limitations"""
-        prompt = self.ai_generator.SYSTEM_PROMPT
-        
-        # Check for search limitations
-        self.assertIn("One search per query maximum", prompt)
-        self.assertIn("If search yields no results", prompt)
+        self._assert_prompt_contains((
+            "One search per query maximum",
+            "If search yields no results"
+        ))
 
 if __name__ == '__main__':
-    # Create a test suite
-    suite = unittest.TestSuite()
-    loader = unittest.TestLoader()
-    
-    # Add all test cases
-    suite.addTest(loader.loadTestsFromTestCase(TestAIGeneratorToolIntegration))
-    suite.addTest(loader.loadTestsFromTestCase(TestToolCallErrorHandling))
-    suite.addTest(loader.loadTestsFromTestCase(TestAIGeneratorSystemPrompt))
-    
-    # Run the tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Print summary
-    print(f"\nTest Summary:")
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    
-    if result.failures:
-        print(f"\nFailures:")
-        for test, traceback in result.failures:
-            print(f"- {test}: {traceback}")
-    
-    if result.errors:
-        print(f"\nErrors:")
-        for test, traceback in result.errors:
-            print(f"- {test}: {traceback}")
\ No newline at end of file
+    unittest.main(verbosity=2)
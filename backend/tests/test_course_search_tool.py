@@ -1,23 +1,46 @@
 """Tests for CourseSearchTool execute method outputs"""
 
+import time
 import unittest
-import sys
-import os
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from concurrent.futures import ThreadPoolExecutor
 
-from search_tools import CourseSearchTool, ToolManager
 from test_helpers import MockVectorStore, create_test_course, create_test_chunks
+from search_tools import CourseSearchTool, CourseOutlineTool, ToolManager
 from vector_store import SearchResults
 
+# Read-only search results shared by the formatting tests
+_LESSON_RESULTS = SearchResults(
+    documents=["Test content for lesson 1", "Test content for lesson 2"],
+    metadata=[
+        {"course_title": "Test Course", "lesson_number": 1},
+        {"course_title": "Test Course", "lesson_number": 2}
+    ],
+    distances=[0.1, 0.2]
+)
+_NO_LESSON_RESULTS = SearchResults(
+    documents=["General course content"],
+    metadata=[{"course_title": "Test Course"}],
+    distances=[0.1]
+)
+
 class TestCourseSearchTool(unittest.TestCase):
     """Test cases for CourseSearchTool execution and output formatting"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.mock_vector_store = MockVectorStore()
-        self.search_tool = CourseSearchTool(self.mock_vector_store)
-        self.tool_manager = ToolManager()
-        self.tool_manager.register_tool(self.search_tool)
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by every test in the class"""
+        cls.mock_vector_store = MockVectorStore()
+        cls.search_tool = CourseSearchTool(cls.mock_vector_store)
+        cls.tool_manager = ToolManager()
+        cls.tool_manager.register_tool(cls.search_tool)
+    
+    def tearDown(self):
+        """Reset the per-test state left on the shared fixtures"""
+        self.search_tool.last_sources = []
+        self.tool_manager.clear_caches()
+        self.mock_vector_store.clear_all_data()
+        self.mock_vector_store.last_query = None
+        self.mock_vector_store.last_filters = None
     
     def test_get_tool_definition(self):
         """Test that tool definition is correctly structured"""
@@ -46,47 +69,24 @@ class TestCourseSearchTool(unittest.TestCase):
         self.assertIn("course_name", properties)
         self.assertIn("lesson_number", properties)
     
-    def test_execute_basic_query(self):
-        """Test basic query execution with successful results"""
-        result = self.search_tool.execute("python")
-        
-        # Should return formatted results
-        self.assertIsInstance(result, str)
-        self.assertIn("Python Fundamentals", result)
-        self.assertIn("Python is a programming language", result)
-        
-        # Check that sources are tracked
-        self.assertTrue(len(self.search_tool.last_sources) > 0)
-        self.assertIn("Python Fundamentals", self.search_tool.last_sources[0])
-    
-    def test_execute_with_course_filter(self):
-        """Test query execution with course name filter"""
-        result = self.search_tool.execute("python", course_name="Python Fundamentals")
-        
-        # Check that vector store received the course filter
-        self.assertEqual(self.mock_vector_store.last_filters["course_name"], "Python Fundamentals")
-        
-        # Should return formatted results
-        self.assertIsInstance(result, str)
-        self.assertIn("Python Fundamentals", result)
-    
-    def test_execute_with_lesson_filter(self):
-        """Test query execution with lesson number filter"""
-        result = self.search_tool.execute("python", lesson_number=1)
-        
-        # Check that vector store received the lesson filter
-        self.assertEqual(self.mock_vector_store.last_filters["lesson_number"], 1)
-        
-        # Should return formatted results
-        self.assertIsInstance(result, str)
-    
-    def test_execute_with_both_filters(self):
-        """Test query execution with both course and lesson filters"""
-        result = self.search_tool.execute("python", course_name="Python Fundamentals", lesson_number=1)
+    def test_execute_with_filters(self):
+        """Test that course and lesson filters reach the vector store"""
+        cases = [
+            ("Python Fundamentals", None),
+            (None, 1),
+            ("Python Fundamentals", 1)
+        ]
         
-        # Check that vector store received both filters
-        self.assertEqual(self.mock_vector_store.last_filters["course_name"], "Python Fundamentals")
-        self.assertEqual(self.mock_vector_store.last_filters["lesson_number"], 1)
+        for course, lesson in cases:
+            with self.subTest(course=course, lesson=lesson):
+                result = self.search_tool.execute("python", course_name=course, lesson_number=lesson)
+                
+                # Vector store receives exactly the requested filters
+                self.assertEqual(
+                    self.mock_vector_store.last_filters,
+                    {"course_name": course, "lesson_number": lesson}
+                )
+                self.assertIn("Python Fundamentals", result)
     
     def test_execute_no_results(self):
         """Test query execution that returns no results"""
@@ -118,17 +118,7 @@ class TestCourseSearchTool(unittest.TestCase):
     
     def test_format_results_with_lesson_numbers(self):
         """Test result formatting includes lesson numbers when available"""
-        # Create mock search results
-        results = SearchResults(
-            documents=["Test content for lesson 1", "Test content for lesson 2"],
-            metadata=[
-                {"course_title": "Test Course", "lesson_number": 1},
-                {"course_title": "Test Course", "lesson_number": 2}
-            ],
-            distances=[0.1, 0.2]
-        )
-        
-        formatted = self.search_tool._format_results(results)
+        formatted = self.search_tool._format_results(_LESSON_RESULTS)
         
         # Should include lesson numbers in headers
         self.assertIn("[Test Course - Lesson 1]", formatted)
@@ -138,14 +128,7 @@ class TestCourseSearchTool(unittest.TestCase):
     
     def test_format_results_without_lesson_numbers(self):
         """Test result formatting works without lesson numbers"""
-        # Create mock search results without lesson numbers
-        results = SearchResults(
-            documents=["General course content"],
-            metadata=[{"course_title": "Test Course"}],
-            distances=[0.1]
-        )
-        
-        formatted = self.search_tool._format_results(results)
+        formatted = self.search_tool._format_results(_NO_LESSON_RESULTS)
         
         # Should include course title but no lesson number
         self.assertIn("[Test Course]", formatted)
@@ -153,12 +136,18 @@ class TestCourseSearchTool(unittest.TestCase):
         self.assertIn("General course content", formatted)
     
     def test_sources_tracking(self):
-        """Test that sources are properly tracked and retrievable"""
+        """Test basic query results and that their sources are tracked"""
         # Execute a query
-        self.search_tool.execute("python")
+        result = self.search_tool.execute("python")
+        
+        # Should return formatted results
+        self.assertIsInstance(result, str)
+        self.assertIn("Python Fundamentals", result)
+        self.assertIn("Python is a programming language", result)
         
         # Check sources are tracked
         self.assertTrue(len(self.search_tool.last_sources) > 0)
+        self.assertIn("Python Fundamentals", self.search_tool.last_sources[0])
         
         # Execute another query
         self.search_tool.execute("no results query")
@@ -166,6 +155,23 @@ class TestCourseSearchTool(unittest.TestCase):
         # Sources should be cleared for empty results
         self.assertEqual(len(self.search_tool.last_sources), 0)
     
+    def test_repeated_query_served_from_cache(self):
+        """Test that identical searches skip the vector store"""
+        first = self.search_tool.execute("python", lesson_number=1)
+        self.mock_vector_store.last_query = None
+        self.search_tool.last_sources = []
+
+        # Normalized repeat should not reach the store
+        second = self.search_tool.execute("  Python ", lesson_number=1)
+        self.assertEqual(first, second)
+        self.assertIsNone(self.mock_vector_store.last_query)
+        self.assertIn("Python Fundamentals - Lesson 1", self.search_tool.last_sources)
+
+        # Clearing caches forces a fresh search
+        self.tool_manager.clear_caches()
+        self.search_tool.execute("python", lesson_number=1)
+        self.assertEqual(self.mock_vector_store.last_query, "python")
+
     def test_tool_manager_integration(self):
         """Test integration with ToolManager"""
         # Test tool registration
@@ -184,85 +190,176 @@ class TestCourseSearchTool(unittest.TestCase):
         sources_after_reset = self.tool_manager.get_last_sources()
         self.assertEqual(len(sources_after_reset), 0)
     
+    def test_sources_follow_last_executed_tool(self):
+        """Test that sources come from the most recently executed tool"""
+        self.mock_vector_store.add_course_metadata(create_test_course())
+        outline_tool = CourseOutlineTool(self.mock_vector_store)
+        tool_manager = ToolManager()
+        tool_manager.register_tool(self.search_tool)
+        tool_manager.register_tool(outline_tool)
+
+        tool_manager.execute_tool("search_course_content", query="python")
+        tool_manager.execute_tool("get_course_outline", course_title="python")
+
+        # Outline sources win and the earlier search sources are dropped
+        self.assertEqual(tool_manager.get_last_sources(), ["Python Fundamentals"])
+
+        tool_manager.reset_sources()
+        self.assertEqual(tool_manager.get_last_sources(), [])
+
+    def test_tool_definitions_cached_until_registration(self):
+        """Test that tool definitions are reused and refreshed on registration"""
+        tool_manager = ToolManager()
+        tool_manager.register_tool(self.search_tool)
+        definitions = tool_manager.get_tool_definitions()
+        self.assertIs(tool_manager.get_tool_definitions(), definitions)
+
+        # Registering another tool invalidates the cached list
+        tool_manager.register_tool(CourseOutlineTool(self.mock_vector_store))
+        refreshed = tool_manager.get_tool_definitions()
+        self.assertIsNot(refreshed, definitions)
+        self.assertEqual(len(refreshed), 2)
+
+    def test_execute_tools_preserves_order(self):
+        """Test that concurrent tool execution returns results in call order"""
+        results = self.tool_manager.execute_tools([
+            ("search_course_content", {"query": "python"}),
+            ("search_course_content", {"query": "no results query"}),
+            ("invalid_tool", {"query": "test"})
+        ])
+
+        self.assertEqual(len(results), 3)
+        self.assertIn("Python Fundamentals", results[0])
+        self.assertIn("No relevant content found", results[1])
+        self.assertIn("not found", results[2])
+
+    def test_execute_tools_merges_sources_in_call_order(self):
+        """Test that parallel calls keep each call's sources, merged in call order"""
+        self.mock_vector_store.add_course_metadata(create_test_course())
+        tool_manager = ToolManager()
+        tool_manager.register_tool(self.search_tool)
+        outline_tool = CourseOutlineTool(self.mock_vector_store)
+        tool_manager.register_tool(outline_tool)
+
+        tool_manager.execute_tools([
+            ("get_course_outline", {"course_title": "python"}),
+            ("search_course_content", {"query": "python", "lesson_number": 1}),
+            ("search_course_content", {"query": "no results query"})
+        ])
+
+        # An empty later search no longer wipes the earlier calls' sources
+        self.assertEqual(tool_manager.get_last_sources(), [
+            "Python Fundamentals",
+            "Python Fundamentals - Lesson 1",
+            "Python Fundamentals - Lesson 2"
+        ])
+
+        tool_manager.reset_sources()
+        self.assertEqual(tool_manager.get_last_sources(), [])
+
+    def test_execute_tools_serializes_calls_to_one_tool(self):
+        """Test that calls sharing a tool instance never overlap, even across batches"""
+        active, overlaps = [], []
+
+        class SlowTool:
+            last_sources = []
+
+            def get_tool_definition(self):
+                return {"name": "slow"}
+
+            def execute(self, query):
+                active.append(query)
+                if len(active) > 1:
+                    overlaps.append(query)
+                time.sleep(0.01)
+                self.last_sources = [query]
+                active.remove(query)
+                return query
+
+        tool_manager = ToolManager()
+        tool_manager.register_tool(SlowTool())
+
+        # Two batches at once, as two concurrent requests would send them
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            batches = list(executor.map(
+                lambda queries: tool_manager.execute_tools([("slow", {"query": q}) for q in queries]),
+                ("abc", "xyz")
+            ))
+
+        self.assertEqual(batches, [["a", "b", "c"], ["x", "y", "z"]])
+        self.assertEqual(overlaps, [])
+
     def test_invalid_tool_execution(self):
         """Test handling of invalid tool names"""
         result = self.tool_manager.execute_tool("invalid_tool", query="test")
         self.assertIn("not found", result)
 
-class TestCourseSearchToolEdgeCases(unittest.TestCase):
-    """Test edge cases and error conditions for CourseSearchTool"""
+class TestCourseOutlineTool(unittest.TestCase):
+    """Test cases for CourseOutlineTool metadata lookup"""
     
     def setUp(self):
         """Set up test fixtures"""
         self.mock_vector_store = MockVectorStore()
-        self.search_tool = CourseSearchTool(self.mock_vector_store)
-    
-    def test_empty_query(self):
-        """Test execution with empty query"""
-        result = self.search_tool.execute("")
-        self.assertIsInstance(result, str)
-    
-    def test_none_query(self):
-        """Test execution with None query - should return error message"""
-        result = self.search_tool.execute(None)
-        self.assertIn("Error: Query cannot be None", result)
+        self.mock_vector_store.add_course_metadata(create_test_course())
+        self.outline_tool = CourseOutlineTool(self.mock_vector_store)
     
-    def test_special_characters_in_query(self):
-        """Test query with special characters"""
-        result = self.search_tool.execute("What is Python? & How does it work!")
-        self.assertIsInstance(result, str)
+    def test_outline_from_catalog_skips_search(self):
+        """Test that a known course is outlined without a vector search"""
+        result = self.outline_tool.execute("python")
+        
+        self.assertIn("**Course Title:** Python Fundamentals", result)
+        self.assertIn("http://example.com/course", result)
+        self.assertIn("1. Introduction to Python", result)
+        self.assertIn("**Total Lessons:** 2", result)
+        self.assertIsNone(self.mock_vector_store.last_query)
+        self.assertEqual(self.outline_tool.last_sources, ["Python Fundamentals"])
     
-    def test_unicode_query(self):
-        """Test query with unicode characters"""
-        result = self.search_tool.execute("¿Qué es Python? 中文 العربية")
-        self.assertIsInstance(result, str)
+    def test_outline_falls_back_to_search(self):
+        """Test that unknown titles fall back to content search"""
+        result = self.outline_tool.execute("Introduction")
+        
+        self.assertEqual(self.mock_vector_store.last_filters["course_name"], "Introduction")
+        self.assertIn("Python Fundamentals", result)
+
+class TestCourseSearchToolEdgeCases(unittest.TestCase):
+    """Test edge cases and error conditions for CourseSearchTool"""
     
-    def test_very_long_query(self):
-        """Test with very long query"""
-        long_query = "What is Python? " * 100
-        result = self.search_tool.execute(long_query)
-        self.assertIsInstance(result, str)
+    @classmethod
+    def setUpClass(cls):
+        """Set up fixtures shared by every test in the class"""
+        cls.mock_vector_store = MockVectorStore()
+        cls.search_tool = CourseSearchTool(cls.mock_vector_store)
     
-    def test_negative_lesson_number(self):
-        """Test with negative lesson number"""
-        result = self.search_tool.execute("python", lesson_number=-1)
-        self.assertIsInstance(result, str)
+    def tearDown(self):
+        """Reset the per-test state left on the shared fixtures"""
+        self.search_tool.last_sources = []
+        self.search_tool.cache.clear()
+        self.mock_vector_store.last_query = None
+        self.mock_vector_store.last_filters = None
     
-    def test_zero_lesson_number(self):
-        """Test with zero lesson number"""
-        result = self.search_tool.execute("python", lesson_number=0)
-        self.assertIsInstance(result, str)
+    def test_query_variants(self):
+        """Test unusual queries, checking the message only where one is expected"""
+        cases = [
+            ("", None),
+            ("What is Python? & How does it work!", None),
+            ("¿Qué es Python? 中文 العربية", None),
+            ("What is Python? " * 100, None),
+            (None, "Error: Query cannot be None")
+        ]
+        
+        for query, expected_substr in cases:
+            with self.subTest(query=query if query is None else query[:40]):
+                result = self.search_tool.execute(query)
+                self.assertIsInstance(result, str)
+                if expected_substr is not None:
+                    self.assertIn(expected_substr, result)
     
-    def test_large_lesson_number(self):
-        """Test with very large lesson number"""
-        result = self.search_tool.execute("python", lesson_number=9999)
-        self.assertIsInstance(result, str)
+    def test_lesson_number_variants(self):
+        """Test negative, zero and very large lesson numbers"""
+        for lesson_number in (-1, 0, 9999):
+            with self.subTest(lesson_number=lesson_number):
+                result = self.search_tool.execute("python", lesson_number=lesson_number)
+                self.assertIsInstance(result, str)
 
 if __name__ == '__main__':
-    # Create a test suite
-    suite = unittest.TestSuite()
-    loader = unittest.TestLoader()
-    
-    # Add all test cases
-    suite.addTest(loader.loadTestsFromTestCase(TestCourseSearchTool))
-    suite.addTest(loader.loadTestsFromTestCase(TestCourseSearchToolEdgeCases))
-    
-    # Run the tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Print summary
-    print(f"\nTest Summary:")
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
-    
-    if result.failures:
-        print(f"\nFailures:")
-        for test, traceback in result.failures:
-            print(f"- {test}: {traceback}")
-    
-    if result.errors:
-        print(f"\nErrors:")
-        for test, traceback in result.errors:
-            print(f"- {test}: {traceback}")
\ No newline at end of file
+    unittest.main(verbosity=2)
@@ -1,22 +1,57 @@
 """Test helper utilities and fixtures for RAG system testing"""
 
 import os
-import tempfile
-import shutil
-from typing import List, Dict, Any
-from unittest.mock import Mock, MagicMock
 import sys
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+import pathlib
+import tempfile
+from contextlib import contextmanager
+from typing import List
+from unittest.mock import patch
 
-from vector_store import VectorStore, SearchResults
+# Pytest gets this from conftest.py; direct unittest runs rely on it here,
+# so test modules must import test_helpers before any backend module
+_BACKEND_DIR = str(pathlib.Path(__file__).resolve().parent.parent)
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+
+from vector_store import SearchResults
 from models import Course, Lesson, CourseChunk
 
+# Canned search results, shared because tests only read them
+_EMPTY_RESULTS = SearchResults(documents=[], metadata=[], distances=[])
+_PYTHON_RESULTS = SearchResults(
+    documents=[
+        "Python is a programming language used for data science and web development.",
+        "This lesson covers basic Python syntax and variables."
+    ],
+    metadata=[
+        {"course_title": "Python Fundamentals", "lesson_number": 1, "lesson_title": "Introduction to Python"},
+        {"course_title": "Python Fundamentals", "lesson_number": 2, "lesson_title": "Variables and Data Types"}
+    ],
+    distances=[0.2, 0.3]
+)
+
+# Canned result per query trigger, in priority order: the first listed
+# trigger found anywhere in the query decides
+_CANNED_RESULTS = {
+    "no results": _EMPTY_RESULTS,
+    "error": SearchResults.empty("Mock search error"),
+    "python": _PYTHON_RESULTS,
+    "introduction": _PYTHON_RESULTS,
+    "lesson": _PYTHON_RESULTS
+}
+
+# Course names the mock store resolves, keyed by lower-cased query
+_RESOLVE_MAP = {
+    "python": "Python Fundamentals",
+    "mcp": "MCP Introduction",
+    "unknown": None
+}
+
 class MockVectorStore:
     """Mock vector store for testing without ChromaDB dependencies"""
     
-    def __init__(self, mock_courses=None, mock_content=None):
-        self.mock_courses = mock_courses or {}
-        self.mock_content = mock_content or []
+    def __init__(self):
         self.last_query = None
         self.last_filters = None
         self._existing_titles = set()
@@ -36,29 +71,14 @@ class MockVectorStore:
         self.last_query = query
         self.last_filters = {'course_name': course_name, 'lesson_number': lesson_number}
         
-        # Return different results based on the query
-        if "no results" in query.lower():
-            return SearchResults(documents=[], metadata=[], distances=[])
-        
-        if "error" in query.lower():
-            return SearchResults.empty("Mock search error")
-        
-        # Return mock course content
-        if any(term in query.lower() for term in ["python", "introduction", "lesson"]):
-            return SearchResults(
-                documents=[
-                    "Python is a programming language used for data science and web development.",
-                    "This lesson covers basic Python syntax and variables."
-                ],
-                metadata=[
-                    {"course_title": "Python Fundamentals", "lesson_number": 1, "lesson_title": "Introduction to Python"},
-                    {"course_title": "Python Fundamentals", "lesson_number": 2, "lesson_title": "Variables and Data Types"}
-                ],
-                distances=[0.2, 0.3]
-            )
+        # Return the canned result for the highest-priority trigger in the query
+        query_lower = query.lower()
+        for trigger, results in _CANNED_RESULTS.items():
+            if trigger in query_lower:
+                return results
         
         # Return empty results for unknown queries
-        return SearchResults(documents=[], metadata=[], distances=[])
+        return _EMPTY_RESULTS
     
     def get_existing_course_titles(self) -> list:
         """Get all existing course titles"""
@@ -83,44 +103,53 @@ class MockVectorStore:
         """Get the total number of courses"""
         return len(self._existing_titles)
     
+    def get_course_outline(self, title_query: str):
+        """Mock outline lookup by case-insensitive title substring"""
+        for title, course in self._course_metadata.items():
+            if title_query.lower() in title.lower():
+                return {
+                    'title': course.title,
+                    'link': course.course_link or '',
+                    'lessons': [{'number': l.lesson_number, 'title': l.title} for l in course.lessons]
+                }
+        return None
+    
     def _resolve_course_name(self, course_name: str):
         """Mock course name resolution"""
-        mock_mapping = {
-            "python": "Python Fundamentals",
-            "mcp": "MCP Introduction",
-            "unknown": None
-        }
-        return mock_mapping.get(course_name.lower())
+        return _RESOLVE_MAP.get(course_name.lower())
 
-def create_test_course() -> Course:
-    """Create a test course object"""
-    lessons = [
+# Read-only course fixtures, built once at import
+_TEST_COURSE = Course(
+    title="Python Fundamentals",
+    instructor="Test Instructor",
+    course_link="http://example.com/course",
+    lessons=[
         Lesson(lesson_number=1, title="Introduction to Python", lesson_link="http://example.com/lesson1"),
         Lesson(lesson_number=2, title="Variables and Data Types", lesson_link="http://example.com/lesson2")
     ]
-    return Course(
-        title="Python Fundamentals",
-        instructor="Test Instructor",
-        course_link="http://example.com/course",
-        lessons=lessons
+)
+_TEST_CHUNKS = (
+    CourseChunk(
+        course_title="Python Fundamentals",
+        lesson_number=1,
+        chunk_index=0,
+        content="Python is a programming language used for data science and web development."
+    ),
+    CourseChunk(
+        course_title="Python Fundamentals",
+        lesson_number=2,
+        chunk_index=1,
+        content="This lesson covers basic Python syntax and variables."
     )
+)
+
+def create_test_course() -> Course:
+    """Return the shared test course object"""
+    return _TEST_COURSE
 
 def create_test_chunks() -> List[CourseChunk]:
-    """Create test course chunks"""
-    return [
-        CourseChunk(
-            course_title="Python Fundamentals",
-            lesson_number=1,
-            chunk_index=0,
-            content="Python is a programming language used for data science and web development."
-        ),
-        CourseChunk(
-            course_title="Python Fundamentals", 
-            lesson_number=2,
-            chunk_index=1,
-            content="This lesson covers basic Python syntax and variables."
-        )
-    ]
+    """Return a fresh list of the shared test course chunks"""
+    return list(_TEST_CHUNKS)
 
 class MockAIGenerator:
     """Mock AI generator for testing without API calls"""
@@ -135,7 +164,7 @@ class MockAIGenerator:
             "tool_use": "Using search tools to find course content."
         }
     
-    def generate_response(self, query: str, conversation_history=None, tools=None, tool_manager=None):
+    def generate_response(self, query: str, messages=None, tools=None, tool_manager=None):
         """Mock response generation"""
         self.last_query = query
         self.last_tools = tools
@@ -167,6 +196,14 @@ def cleanup_temp_file(file_path: str):
     if os.path.exists(file_path):
         os.unlink(file_path)
 
+@contextmanager
+def patched_fs(listing=(), exists=True, isfile=True):
+    """Fake the folder checks and listing used when adding a course folder"""
+    with patch('os.path.exists', return_value=exists), \
+         patch('os.listdir', return_value=list(listing)), \
+         patch('os.path.isfile', return_value=isfile):
+        yield
+
 class TestConfig:
     """Test configuration object"""
     CHUNK_SIZE = 800
@@ -0,0 +1,119 @@
+"""Tests for the search validation and caches in proposed_fixes"""
+
+import functools
+import unittest
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
+
+import numpy as np
+
+import test_helpers  # noqa: F401 - puts the backend on sys.path
+from proposed_fixes import SemanticSearchCache, execute_fixed, invalidate_search_cache, search_fixed
+from search_tools import ResponseCache
+from vector_store import SearchResults
+
+# Arguments the search itself would accept without raising
+_INVALID_ARGS = (
+    ({"query": ""}, ValueError),
+    ({"query": "   \n"}, ValueError),
+    ({"query": "python", "lesson_number": "1"}, TypeError),
+    ({"query": "python", "lesson_number": True}, TypeError),
+    ({"query": "python", "course_name": False}, TypeError),
+    ({"query": "python", "limit": True}, ValueError)
+)
+
+# Fake embeddings: the first three are near-identical, as real ones would be
+_EMBEDDINGS = {
+    "lesson 1 intro": [1.0, 0.0, 0.0],
+    "intro to lesson 1": [1.0, 0.02, 0.0],
+    "lesson 2 intro": [1.0, 0.01, 0.0],
+    "python basics": [0.0, 1.0, 0.0]
+}
+_CHROMA_HIT = {'documents': [["Lesson content"]], 'metadatas': [[{"course_title": "Python Fundamentals"}]], 'distances': [[0.1]]}
+
+def _make_store() -> Mock:
+    """Create a store whose search is search_fixed and whose backend must stay untouched"""
+    store = Mock()
+    store.search = functools.partial(search_fixed, store)
+    return store
+
+class TestSearchFixedValidation(unittest.TestCase):
+    """Test that search_fixed rejects silently accepted input up front"""
+
+    def test_invalid_args_raise_before_searching(self):
+        """Test blank queries and bool or string filters raise without embedding"""
+        for kwargs, error in _INVALID_ARGS:
+            with self.subTest(**kwargs):
+                store = _make_store()
+                with self.assertRaises(error):
+                    store.search(**kwargs)
+                store.embedding_function.assert_not_called()
+                store._search_cache.get.assert_not_called()
+
+    def test_execute_fixed_reports_invalid_args(self):
+        """Test execute_fixed turns the raised errors into messages"""
+        cases = [
+            ({"query": "  "}, "Query cannot be empty"),
+            ({"query": "python", "lesson_number": "2"}, "Lesson number must be an integer, got str"),
+            ({"query": "python", "lesson_number": False}, "Lesson number must be an integer, got bool")
+        ]
+
+        for kwargs, expected in cases:
+            with self.subTest(**kwargs):
+                tool = SimpleNamespace(store=_make_store(), last_sources=[])
+                self.assertEqual(execute_fixed(tool, **kwargs), f"Error: {expected}")
+
+class TestSemanticSearchCache(unittest.TestCase):
+    """Test which searches search_fixed serves from its caches"""
+
+    def setUp(self):
+        """Build a store with real caches over a fake collection"""
+        self.store = SimpleNamespace(
+            max_results=5,
+            _search_cache=ResponseCache(),
+            _semantic_cache=SemanticSearchCache(),
+            _cache_generation=0,
+            _resolve_course_name=lambda name: name,
+            _build_filter=lambda title, lesson: None,
+            embedding_function=lambda texts: [_EMBEDDINGS[texts[0]]],
+            course_content=Mock(**{"query.return_value": _CHROMA_HIT})
+        )
+
+    def _searches_run(self, *queries) -> int:
+        """Search each query in turn, returning how many reached the collection"""
+        for query in queries:
+            search_fixed(self.store, query)
+        return self.store.course_content.query.call_count
+
+    def test_paraphrase_hits(self):
+        """Test a near-duplicate query with the same numbers reuses the results"""
+        self.assertEqual(self._searches_run("lesson 1 intro", "intro to lesson 1"), 1)
+
+    def test_different_number_misses(self):
+        """Test a near-duplicate query with another lesson number searches again"""
+        self.assertEqual(self._searches_run("lesson 1 intro", "lesson 2 intro"), 2)
+
+    def test_unrelated_query_misses(self):
+        """Test a dissimilar query searches again"""
+        self.assertEqual(self._searches_run("lesson 1 intro", "python basics"), 2)
+
+    def test_entries_expire_after_ttl(self):
+        """Test cached searches stop matching once older than the TTL"""
+        cache = SemanticSearchCache(ttl=10.0)
+        embedding = np.asarray(_EMBEDDINGS["lesson 1 intro"], dtype=np.float32)
+        result = SearchResults.from_chroma(_CHROMA_HIT)
+        with patch('proposed_fixes.time.monotonic', return_value=100.0):
+            cache.put("space", embedding, result)
+        for now, expected in ((109.0, result), (111.0, None)):
+            with self.subTest(now=now), patch('proposed_fixes.time.monotonic', return_value=now):
+                self.assertIs(cache.get("space", embedding), expected)
+
+    def test_invalidation_forces_new_search(self):
+        """Test that bumping the cache generation drops cached results"""
+        self.assertEqual(self._searches_run("lesson 1 intro", "lesson 1 intro"), 1)
+        invalidate_search_cache(self.store)
+        self.assertEqual(self.store._cache_generation, 1)
+        self.assertEqual(self._searches_run("lesson 1 intro"), 2)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
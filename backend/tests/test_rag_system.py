@@ -1,45 +1,78 @@
 """Tests for RAG system content-query handling"""
 
+import functools
+import json
+import threading
 import unittest
-from unittest.mock import Mock, MagicMock, patch
-import sys
-import os
-import tempfile
-import shutil
-sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from types import SimpleNamespace
+from unittest.mock import DEFAULT, Mock, MagicMock, patch
 
-from rag_system import RAGSystem
-from test_helpers import MockVectorStore, MockAIGenerator, TestConfig, create_test_course, create_test_chunks
-from document_processor import DocumentProcessor
-from session_manager import SessionManager
+from test_helpers import MockVectorStore, MockAIGenerator, TestConfig, create_test_course, create_test_chunks, patched_fs
 
-class TestRAGSystemContentQueries(unittest.TestCase):
-    """Test RAG system's handling of content-related queries"""
+# Course fixtures are read-only, so every test shares one copy
+_TEST_COURSE = create_test_course()
+_TEST_CHUNKS = create_test_chunks()
+
+@functools.cache
+def _mocked_rag_fixtures():
+    """Build the RAG system with mocked components once per module"""
+    import rag_system as rag_module
+    from document_processor import DocumentProcessor
+    from session_manager import SessionManager
+    fixtures = SimpleNamespace(
+        config=TestConfig(),
+        mock_vector_store=MockVectorStore(),
+        mock_ai_generator=MockAIGenerator(),
+        mock_doc_processor=Mock(spec_set=DocumentProcessor),
+        mock_session_manager=Mock(spec_set=SessionManager)
+    )
+    
+    # Swap in component classes that return our mock instances
+    with patch.multiple(
+        rag_module,
+        VectorStore=Mock(return_value=fixtures.mock_vector_store),
+        AIGenerator=Mock(return_value=fixtures.mock_ai_generator),
+        DocumentProcessor=Mock(return_value=fixtures.mock_doc_processor),
+        SessionManager=Mock(return_value=fixtures.mock_session_manager)
+    ):
+        fixtures.rag_system = rag_module.RAGSystem(fixtures.config)
+    return fixtures
+
+class MockedRAGSystemTestCase(unittest.TestCase):
+    """Base class sharing one RAG system with mocked components across the module"""
+    
+    @classmethod
+    def setUpClass(cls):
+        """Attach the module's shared RAG system and mocks to the class"""
+        for name, value in vars(_mocked_rag_fixtures()).items():
+            setattr(cls, name, value)
     
     def setUp(self):
-        """Set up test fixtures"""
-        self.config = TestConfig()
-        
-        # Create a RAG system with mocked components
-        with patch('rag_system.VectorStore') as mock_vector_store_class, \
-             patch('rag_system.AIGenerator') as mock_ai_generator_class, \
-             patch('rag_system.DocumentProcessor') as mock_doc_processor_class, \
-             patch('rag_system.SessionManager') as mock_session_manager_class:
-            
-            # Set up mock instances
-            self.mock_vector_store = MockVectorStore()
-            self.mock_ai_generator = MockAIGenerator()
-            self.mock_doc_processor = Mock()
-            self.mock_session_manager = Mock()
-            
-            # Configure mock classes to return our mock instances
-            mock_vector_store_class.return_value = self.mock_vector_store
-            mock_ai_generator_class.return_value = self.mock_ai_generator
-            mock_doc_processor_class.return_value = self.mock_doc_processor
-            mock_session_manager_class.return_value = self.mock_session_manager
-            
-            # Initialize RAG system
-            self.rag_system = RAGSystem(self.config)
+        """Reset the state earlier tests left on the shared mocks"""
+        self.mock_session_manager.reset_mock(return_value=True, side_effect=True)
+        self.mock_doc_processor.reset_mock(return_value=True, side_effect=True)
+        self.mock_ai_generator.last_query = None
+        self.mock_ai_generator.last_tools = None
+        self.mock_ai_generator.last_tool_manager = None
+        self.mock_vector_store.clear_all_data()
+        self.mock_vector_store.last_query = None
+        self.mock_vector_store.last_filters = None
+        self.rag_system.tool_manager.clear_caches()
+        self.rag_system.tool_manager.reset_sources()
+
+class TestRAGSystemContentQueries(MockedRAGSystemTestCase):
+    """Test RAG system's handling of content-related queries"""
+    
+    # Representative content queries for test_different_query_types
+    _QUERIES = (
+        "What is Python?",
+        "Explain variables in Python",
+        "How do I use loops?",
+        "What's in lesson 1?",
+        "Show me the course outline"
+    )
     
     def test_basic_content_query(self):
         """Test basic content query processing"""
@@ -63,12 +96,15 @@ class TestRAGSystemContentQueries(unittest.TestCase):
         query = "What is Python?"
         
         # Mock session manager to return some history
-        self.mock_session_manager.get_conversation_history.return_value = "Previous: User asked about programming"
+        self.mock_session_manager.get_messages.return_value = [
+            {"role": "user", "content": "What is programming?"},
+            {"role": "assistant", "content": "Programming is writing code."}
+        ]
         
         response, sources = self.rag_system.query(query, session_id)
         
         # Should call session manager for history
-        self.mock_session_manager.get_conversation_history.assert_called_with(session_id)
+        self.mock_session_manager.get_messages.assert_called_with(session_id)
         
         # Should add exchange to session
         self.mock_session_manager.add_exchange.assert_called_once()
@@ -76,7 +112,7 @@ class TestRAGSystemContentQueries(unittest.TestCase):
         # Verify the call arguments
         call_args = self.mock_session_manager.add_exchange.call_args
         self.assertEqual(call_args[0][0], session_id)  # session_id
-        self.assertEqual(call_args[0][1], query)       # query
+        self.assertIn(query, call_args[0][1])          # prompt as sent
         self.assertEqual(call_args[0][2], response)    # response
     
     def test_tool_integration_in_query(self):
@@ -109,15 +145,7 @@ class TestRAGSystemContentQueries(unittest.TestCase):
     
     def test_different_query_types(self):
         """Test different types of content queries"""
-        test_queries = [
-            "What is Python?",
-            "Explain variables in Python",
-            "How do I use loops?",
-            "What's in lesson 1?",
-            "Show me the course outline"
-        ]
-        
-        for query in test_queries:
+        for query in self._QUERIES:
             with self.subTest(query=query):
                 response, sources = self.rag_system.query(query)
                 
@@ -140,11 +168,11 @@ class TestRAGSystemContentQueries(unittest.TestCase):
     
     def test_course_analytics_integration(self):
         """Test that course analytics work properly"""
-        # Mock vector store methods
-        self.mock_vector_store.get_course_count = Mock(return_value=5)
-        self.mock_vector_store.get_existing_course_titles = Mock(return_value=["Course 1", "Course 2"])
-        
-        analytics = self.rag_system.get_course_analytics()
+        # Mock vector store methods for this test only
+        store = self.mock_vector_store
+        with patch.object(store, 'get_course_count', return_value=5), \
+             patch.object(store, 'get_existing_course_titles', return_value=["Course 1", "Course 2"]):
+            analytics = self.rag_system.get_course_analytics()
         
         # Should return proper analytics structure
         self.assertIn("total_courses", analytics)
@@ -152,44 +180,13 @@ class TestRAGSystemContentQueries(unittest.TestCase):
         self.assertEqual(analytics["total_courses"], 5)
         self.assertEqual(len(analytics["course_titles"]), 2)
 
-class TestRAGSystemDocumentProcessing(unittest.TestCase):
+class TestRAGSystemDocumentProcessing(MockedRAGSystemTestCase):
     """Test RAG system's document processing capabilities"""
     
-    def setUp(self):
-        """Set up test fixtures"""
-        self.config = TestConfig()
-        
-        # Create a RAG system with mocked components
-        with patch('rag_system.VectorStore') as mock_vector_store_class, \
-             patch('rag_system.AIGenerator') as mock_ai_generator_class, \
-             patch('rag_system.DocumentProcessor') as mock_doc_processor_class, \
-             patch('rag_system.SessionManager') as mock_session_manager_class:
-            
-            # Set up mock instances
-            self.mock_vector_store = MockVectorStore()
-            self.mock_ai_generator = MockAIGenerator()
-            self.mock_doc_processor = Mock()
-            self.mock_session_manager = Mock()
-            
-            # Configure mock classes to return our mock instances
-            mock_vector_store_class.return_value = self.mock_vector_store
-            mock_ai_generator_class.return_value = self.mock_ai_generator
-            mock_doc_processor_class.return_value = self.mock_doc_processor
-            mock_session_manager_class.return_value = self.mock_session_manager
-            
-            # Initialize RAG system
-            self.rag_system = RAGSystem(self.config)
-    
     def test_add_course_document(self):
         """Test adding a single course document"""
         # Mock document processor return
-        test_course = create_test_course()
-        test_chunks = create_test_chunks()
-        self.mock_doc_processor.process_course_document.return_value = (test_course, test_chunks)
-        
-        # Mock vector store methods
-        self.mock_vector_store.add_course_metadata = Mock()
-        self.mock_vector_store.add_course_content = Mock()
+        self.mock_doc_processor.process_course_document.return_value = (_TEST_COURSE, _TEST_CHUNKS)
         
         # Add course document
         course, chunk_count = self.rag_system.add_course_document("/fake/path/course.pdf")
@@ -198,9 +195,14 @@ class TestRAGSystemDocumentProcessing(unittest.TestCase):
         self.assertEqual(course.title, "Python Fundamentals")
         self.assertEqual(chunk_count, 2)
         
-        # Check that vector store methods were called
-        self.mock_vector_store.add_course_metadata.assert_called_once_with(test_course)
-        self.mock_vector_store.add_course_content.assert_called_once_with(test_chunks)
+        # Check that the mock store recorded the course and its chunks;
+        # identity checks avoid deep model comparisons
+        store = self.mock_vector_store
+        self.assertEqual(list(store._course_metadata), ["Python Fundamentals"])
+        self.assertIs(store._course_metadata["Python Fundamentals"], _TEST_COURSE)
+        self.assertEqual(len(store._content_chunks), len(_TEST_CHUNKS))
+        for stored, chunk in zip(store._content_chunks, _TEST_CHUNKS):
+            self.assertIs(stored, chunk)
     
     def test_add_course_document_error_handling(self):
         """Test error handling when document processing fails"""
@@ -216,172 +218,220 @@ class TestRAGSystemDocumentProcessing(unittest.TestCase):
     
     def test_add_course_folder_with_clear(self):
         """Test adding course folder with clear existing data"""
-        with patch('os.path.exists') as mock_exists, \
-             patch('os.listdir') as mock_listdir, \
-             patch('os.path.isfile') as mock_isfile:
-            
-            # Mock file system
-            mock_exists.return_value = True
-            mock_listdir.return_value = ['course1.pdf', 'course2.txt', 'other.jpg']
-            mock_isfile.return_value = True
-            
-            # Mock document processor
-            test_course = create_test_course()
-            test_chunks = create_test_chunks()
-            self.mock_doc_processor.process_course_document.return_value = (test_course, test_chunks)
-            
-            # Mock vector store methods - start with empty titles
-            self.mock_vector_store._existing_titles.clear()
-            self.mock_vector_store.clear_all_data = Mock()
-            self.mock_vector_store.add_course_metadata = Mock()
-            self.mock_vector_store.add_course_content = Mock()
-            
-            # Add course folder with clear
+        # Mock document processor
+        self.mock_doc_processor.process_course_document.return_value = (_TEST_COURSE, _TEST_CHUNKS)
+        
+        # Start with a stale course that the rebuild should clear
+        self.mock_vector_store._existing_titles.add("Stale Course")
+        
+        # Add course folder with clear against a mocked file system
+        with patched_fs(['course1.pdf', 'course2.txt', 'other.jpg']):
             total_courses, total_chunks = self.rag_system.add_course_folder("/fake/path", clear_existing=True)
-            
-            # Should clear existing data
-            self.mock_vector_store.clear_all_data.assert_called_once()
-            
-            # Should process valid files (pdf and txt, not jpg)
-            self.assertEqual(self.mock_doc_processor.process_course_document.call_count, 2)
+        
+        # Should clear existing data before adding the new course
+        self.assertEqual(self.mock_vector_store._existing_titles, {"Python Fundamentals"})
+        
+        # Should process valid files (pdf and txt, not jpg)
+        self.assertEqual(self.mock_doc_processor.process_course_document.call_count, 2)
     
     def test_add_course_folder_skip_existing(self):
         """Test that existing courses are skipped when adding folder"""
-        with patch('os.path.exists') as mock_exists, \
-             patch('os.listdir') as mock_listdir, \
-             patch('os.path.isfile') as mock_isfile:
-            
-            # Mock file system
-            mock_exists.return_value = True
-            mock_listdir.return_value = ['course1.pdf']
-            mock_isfile.return_value = True
-            
-            # Mock document processor
-            test_course = create_test_course()
-            test_chunks = create_test_chunks()
-            self.mock_doc_processor.process_course_document.return_value = (test_course, test_chunks)
-            
-            # Mock vector store to return existing course
-            self.mock_vector_store._existing_titles.add("Python Fundamentals")
-            self.mock_vector_store.add_course_metadata = Mock()
-            self.mock_vector_store.add_course_content = Mock()
-            
-            # Add course folder
+        # Mock document processor
+        self.mock_doc_processor.process_course_document.return_value = (_TEST_COURSE, _TEST_CHUNKS)
+        
+        # Mock vector store to return existing course
+        self.mock_vector_store._existing_titles.add("Python Fundamentals")
+        
+        # Add course folder against a mocked file system
+        with patched_fs(['course1.pdf']):
             total_courses, total_chunks = self.rag_system.add_course_folder("/fake/path")
-            
-            # Should skip existing course
-            self.assertEqual(total_courses, 0)
-            self.assertEqual(total_chunks, 0)
-            
-            # Should not call add methods
-            self.mock_vector_store.add_course_metadata.assert_not_called()
-            self.mock_vector_store.add_course_content.assert_not_called()
+        
+        # Should skip existing course
+        self.assertEqual(total_courses, 0)
+        self.assertEqual(total_chunks, 0)
+        
+        # Should not add anything to the store
+        self.assertEqual(self.mock_vector_store._course_metadata, {})
+        self.assertEqual(self.mock_vector_store._content_chunks, [])
     
     def test_add_nonexistent_folder(self):
         """Test handling of non-existent folder"""
-        with patch('os.path.exists') as mock_exists:
-            mock_exists.return_value = False
-            
+        with patched_fs(exists=False):
             total_courses, total_chunks = self.rag_system.add_course_folder("/fake/nonexistent/path")
-            
-            # Should return 0, 0 for non-existent folder
-            self.assertEqual(total_courses, 0)
-            self.assertEqual(total_chunks, 0)
+        
+        # Should return 0, 0 for non-existent folder
+        self.assertEqual(total_courses, 0)
+        self.assertEqual(total_chunks, 0)
 
 class TestRAGSystemComponentInitialization(unittest.TestCase):
     """Test RAG system component initialization"""
     
-    def test_anthropic_provider_initialization(self):
-        """Test initialization with Anthropic provider"""
-        config = TestConfig()
-        config.AI_PROVIDER = "anthropic"
-        
-        with patch('rag_system.VectorStore'), \
-             patch('rag_system.AIGenerator') as mock_ai_gen, \
-             patch('rag_system.DocumentProcessor'), \
-             patch('rag_system.SessionManager'):
-            
-            rag_system = RAGSystem(config)
-            
-            # Should initialize with anthropic settings
-            mock_ai_gen.assert_called_with(
-                api_key=config.ANTHROPIC_API_KEY,
-                model=config.ANTHROPIC_MODEL,
-                provider="anthropic"
-            )
+    def setUp(self):
+        """Patch the RAG system's component classes for each test"""
+        import rag_system as rag_module
+        self.rag_module = rag_module
+        
+        stack = ExitStack()
+        self.addCleanup(stack.close)
+        mocks = stack.enter_context(patch.multiple(
+            rag_module,
+            VectorStore=DEFAULT,
+            AIGenerator=DEFAULT,
+            DocumentProcessor=DEFAULT,
+            SessionManager=DEFAULT
+        ))
+        self.mock_vs = mocks['VectorStore']
+        self.mock_ai_gen = mocks['AIGenerator']
     
-    def test_deepseek_provider_initialization(self):
-        """Test initialization with DeepSeek provider"""
-        config = TestConfig()
-        config.AI_PROVIDER = "deepseek"
-        config.DEEPSEEK_API_KEY = "deepseek-key"
-        config.DEEPSEEK_MODEL = "deepseek-chat"
-        config.DEEPSEEK_BASE_URL = "https://api.deepseek.com"
-        
-        with patch('rag_system.VectorStore'), \
-             patch('rag_system.AIGenerator') as mock_ai_gen, \
-             patch('rag_system.DocumentProcessor'), \
-             patch('rag_system.SessionManager'):
-            
-            rag_system = RAGSystem(config)
-            
-            # Should initialize with deepseek settings
-            mock_ai_gen.assert_called_with(
-                api_key=config.DEEPSEEK_API_KEY,
-                model=config.DEEPSEEK_MODEL,
-                provider="deepseek",
-                base_url=config.DEEPSEEK_BASE_URL
-            )
+    def test_provider_initialization(self):
+        """Test the AI generator is built with each provider's settings"""
+        anthropic_config = TestConfig()
+        anthropic_config.AI_PROVIDER = "anthropic"
+        
+        deepseek_config = TestConfig()
+        deepseek_config.AI_PROVIDER = "deepseek"
+        deepseek_config.DEEPSEEK_API_KEY = "deepseek-key"
+        deepseek_config.DEEPSEEK_MODEL = "deepseek-chat"
+        deepseek_config.DEEPSEEK_BASE_URL = "https://api.deepseek.com"
+        
+        cases = [
+            (anthropic_config, {
+                "api_key": anthropic_config.ANTHROPIC_API_KEY,
+                "model": anthropic_config.ANTHROPIC_MODEL,
+                "provider": "anthropic"
+            }),
+            (deepseek_config, {
+                "api_key": deepseek_config.DEEPSEEK_API_KEY,
+                "model": deepseek_config.DEEPSEEK_MODEL,
+                "provider": "deepseek",
+                "base_url": deepseek_config.DEEPSEEK_BASE_URL
+            })
+        ]
+        
+        for config, expected_kwargs in cases:
+            with self.subTest(provider=config.AI_PROVIDER):
+                self.rag_module.RAGSystem(config)
+                self.mock_ai_gen.assert_called_with(**expected_kwargs)
     
     def test_tool_manager_setup(self):
         """Test that tool manager is properly set up with tools"""
-        config = TestConfig()
-        
-        with patch('rag_system.VectorStore') as mock_vs, \
-             patch('rag_system.AIGenerator'), \
-             patch('rag_system.DocumentProcessor'), \
-             patch('rag_system.SessionManager'):
-            
-            # Create mock vector store instance
-            mock_vector_store = MockVectorStore()
-            mock_vs.return_value = mock_vector_store
-            
-            rag_system = RAGSystem(config)
-            
-            # Should have tool manager with registered tools
-            self.assertIsNotNone(rag_system.tool_manager)
-            self.assertIn("search_course_content", rag_system.tool_manager.tools)
-            
-            # Should have search and outline tools
-            self.assertIsNotNone(rag_system.search_tool)
-            self.assertIsNotNone(rag_system.outline_tool)
+        from vector_store import VectorStore
+        
+        # Tools only hold the store, so a spec'd stub with an empty catalog is enough
+        self.mock_vs.return_value = Mock(
+            spec=VectorStore,
+            get_course_count=Mock(return_value=0),
+            get_existing_course_titles=Mock(return_value=[])
+        )
+        
+        rag_system = self.rag_module.RAGSystem(TestConfig())
+        
+        # Should have tool manager with registered tools
+        self.assertIsNotNone(rag_system.tool_manager)
+        self.assertIn("search_course_content", rag_system.tool_manager.tools)
+        
+        # Should have search and outline tools
+        self.assertIsNotNone(rag_system.search_tool)
+        self.assertIsNotNone(rag_system.outline_tool)
 
-if __name__ == '__main__':
-    # Create a test suite
-    suite = unittest.TestSuite()
-    loader = unittest.TestLoader()
+class TestRAGSystemConversationPrefix(unittest.TestCase):
+    """Test that conversation turns keep a stable, cacheable message prefix"""
     
-    # Add all test cases
-    suite.addTest(loader.loadTestsFromTestCase(TestRAGSystemContentQueries))
-    suite.addTest(loader.loadTestsFromTestCase(TestRAGSystemDocumentProcessing))
-    suite.addTest(loader.loadTestsFromTestCase(TestRAGSystemComponentInitialization))
-    
-    # Run the tests
-    runner = unittest.TextTestRunner(verbosity=2)
-    result = runner.run(suite)
-    
-    # Print summary
-    print(f"\nTest Summary:")
-    print(f"Tests run: {result.testsRun}")
-    print(f"Failures: {len(result.failures)}")
-    print(f"Errors: {len(result.errors)}")
+    def test_next_turn_extends_previous_messages(self):
+        """Test each turn's messages start with the previous turn's, byte for byte"""
+        import rag_system as rag_module
+        mock_client = Mock()
+        mock_client.messages.create.side_effect = [
+            SimpleNamespace(content=[SimpleNamespace(text=f"Answer {turn}")], stop_reason="end_turn")
+            for turn in range(3)
+        ]
+        
+        # Real generator and session manager; only storage and the API are faked
+        with patch.multiple(rag_module, VectorStore=DEFAULT, DocumentProcessor=DEFAULT), \
+             patch('anthropic.Anthropic', return_value=mock_client):
+            rag_system = rag_module.RAGSystem(TestConfig())
+        
+        session_id = rag_system.session_manager.create_session()
+        for query in ("What is Python?", "What are variables?", "How do loops work?"):
+            rag_system.query(query, session_id)
+        
+        sent = [call.kwargs["messages"] for call in mock_client.messages.create.call_args_list]
+        for previous, current in zip(sent, sent[1:]):
+            self.assertEqual(
+                json.dumps(current[:len(previous)]),
+                json.dumps(previous)
+            )
+
+def _fake_stream(texts, final_message):
+    """Build a messages.stream() context manager yielding texts then final_message"""
+    manager = MagicMock()
+    stream = manager.__enter__.return_value
+    stream.text_stream = iter(texts)
+    stream.get_final_message.return_value = final_message
+    return manager
+
+class TestRAGSystemStreaming(unittest.TestCase):
+    """Test streamed queries through a tool-use turn"""
     
-    if result.failures:
-        print(f"\nFailures:")
-        for test, traceback in result.failures:
-            print(f"- {test}: {traceback}")
+    def test_stream_through_tool_call_yields_text_then_sources(self):
+        """Test that text from the follow-up call arrives first and sources come last"""
+        import rag_system as rag_module
+        tool_use = SimpleNamespace(type="tool_use", id="tool_1", name="search_course_content", input={"query": "python"})
+        mock_client = Mock()
+        mock_client.messages.stream.side_effect = [
+            _fake_stream([], SimpleNamespace(stop_reason="tool_use", content=[tool_use])),
+            _fake_stream(["Python ", "is a language."], SimpleNamespace(stop_reason="end_turn"))
+        ]
+        
+        with patch.multiple(rag_module, VectorStore=Mock(return_value=MockVectorStore()), DocumentProcessor=DEFAULT), \
+             patch('anthropic.Anthropic', return_value=mock_client):
+            rag_system = rag_module.RAGSystem(TestConfig())
+        
+        session_id = rag_system.session_manager.create_session()
+        items = list(rag_system.query_stream("What is Python?", session_id))
+        
+        self.assertEqual(items[:-1], ["Python ", "is a language."])
+        self.assertEqual(items[-1], ["Python Fundamentals - Lesson 1", "Python Fundamentals - Lesson 2"])
+        
+        # The tool result reached the follow-up call, and nothing is left behind
+        follow_up = mock_client.messages.stream.call_args_list[1].kwargs["messages"]
+        self.assertEqual(follow_up[-1]["content"][0]["tool_use_id"], "tool_1")
+        self.assertEqual(rag_system.tool_manager.get_last_sources(), [])
     
-    if result.errors:
-        print(f"\nErrors:")
-        for test, traceback in result.errors:
-            print(f"- {test}: {traceback}")
\ No newline at end of file
+    def test_concurrent_streams_keep_their_own_sources(self):
+        """Test that two streams whose tool calls interleave each get only their sources"""
+        import rag_system as rag_module
+        tool_calls = {
+            "outline": SimpleNamespace(type="tool_use", id="tool_1", name="get_course_outline", input={"course_title": "python"}),
+            "search": SimpleNamespace(type="tool_use", id="tool_2", name="search_course_content", input={"query": "python"})
+        }
+        # Neither follow-up starts until both streams have run their tool
+        both_tools_ran = threading.Barrier(2, timeout=5)
+        
+        def fake_stream(**params):
+            last = params["messages"][-1]["content"]
+            if isinstance(last, str):
+                tool_use = next(call for key, call in tool_calls.items() if key in last)
+                return _fake_stream([], SimpleNamespace(stop_reason="tool_use", content=[tool_use]))
+            both_tools_ran.wait()
+            return _fake_stream(["Done."], SimpleNamespace(stop_reason="end_turn"))
+        
+        mock_client = Mock()
+        mock_client.messages.stream.side_effect = fake_stream
+        store = MockVectorStore()
+        store.add_course_metadata(_TEST_COURSE)
+        with patch.multiple(rag_module, VectorStore=Mock(return_value=store), DocumentProcessor=DEFAULT), \
+             patch('anthropic.Anthropic', return_value=mock_client):
+            rag_system = rag_module.RAGSystem(TestConfig())
+        
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            outline_items, search_items = executor.map(
+                lambda query: list(rag_system.query_stream(query)),
+                ("Give me the outline", "Run a search")
+            )
+        
+        self.assertEqual(outline_items, ["Done.", ["Python Fundamentals"]])
+        self.assertEqual(search_items, ["Done.", ["Python Fundamentals - Lesson 1", "Python Fundamentals - Lesson 2"]])
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,25 @@
+"""Tests for the simple app's session history window"""
+
+import unittest
+from unittest.mock import patch
+
+import test_helpers  # noqa: F401 - puts the backend on sys.path
+
+# The frontend directory is only needed to serve files, not to test handlers
+with patch('fastapi.staticfiles.StaticFiles'):
+    import simple_app
+
+class TestAddExchange(unittest.TestCase):
+    """Test that add_exchange keeps at most MAX_TURNS exchanges"""
+
+    def test_window_boundaries(self):
+        """Test zero, one and larger windows after three exchanges"""
+        for max_turns, expected in ((0, []), (1, ["q2", "a2"]), (5, ["q0", "a0", "q1", "a1", "q2", "a2"])):
+            with self.subTest(max_turns=max_turns), patch.object(simple_app, 'MAX_TURNS', max_turns):
+                messages = []
+                for turn in range(3):
+                    simple_app.add_exchange(messages, f"q{turn}", f"a{turn}")
+                self.assertEqual([msg["content"] for msg in messages], expected)
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -1,4 +1,5 @@
 import chromadb
+import difflib
 from chromadb.config import Settings
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
@@ -50,6 +51,9 @@ class VectorStore:
         # Create collections for different types of data
         self.course_catalog = self._create_collection("course_catalog")  # Course titles/instructors
         self.course_content = self._create_collection("course_content")  # Actual course material
+        
+        # In-memory outline index keyed by course title, loaded lazily from the catalog
+        self._courses: Optional[Dict[str, Dict[str, Any]]] = None
     
     def _create_collection(self, name: str):
         """Create or get a ChromaDB collection"""
@@ -158,6 +162,11 @@ class VectorStore:
             }],
             ids=[course.title]
         )
+        
+        if self._courses is not None:
+            self._courses[course.title] = self._build_outline(
+                course.title, course.course_link, lessons_metadata
+            )
     
     def add_course_content(self, chunks: List[CourseChunk]):
         """Add course content chunks to the vector store"""
@@ -187,6 +196,7 @@ class VectorStore:
             # Recreate collections
             self.course_catalog = self._create_collection("course_catalog")
             self.course_content = self._create_collection("course_content")
+            self._courses = {}
         except Exception as e:
             print(f"Error clearing data: {e}")
     
@@ -264,4 +274,52 @@ class VectorStore:
             return None
         except Exception as e:
             print(f"Error getting lesson link: {e}")
-    
\ No newline at end of file
+    
+    
+    @staticmethod
+    def _build_outline(title: str, link: Optional[str], lessons: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Build an outline entry with lessons ordered by number"""
+        outline_lessons = [
+            {'number': lesson['lesson_number'], 'title': lesson['lesson_title']}
+            for lesson in lessons
+            if lesson.get('lesson_number') is not None and lesson.get('lesson_title')
+        ]
+        outline_lessons.sort(key=lambda x: x['number'])
+        return {'title': title, 'link': link or '', 'lessons': outline_lessons}
+    
+    def _course_index(self) -> Dict[str, Dict[str, Any]]:
+        """Return the outline index, loading it from the catalog on first use"""
+        if self._courses is None:
+            self._courses = {
+                meta['title']: self._build_outline(meta['title'], meta.get('course_link'), meta.get('lessons', []))
+                for meta in self.get_all_courses_metadata()
+            }
+        return self._courses
+    
+    def get_course_outline(self, title_query: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a course outline by title without running a vector search.
+        
+        Matches exact titles first, then substrings, then close spellings.
+        
+        Args:
+            title_query: Full or partial course title
+            
+        Returns:
+            Dict with title, link and ordered lessons, or None if no course matches
+        """
+        courses = self._course_index()
+        if not courses:
+            return None
+        
+        needle = title_query.strip().lower()
+        titles = {title.lower(): title for title in courses}
+        if needle in titles:
+            return courses[titles[needle]]
+        
+        for lowered, title in titles.items():
+            if needle in lowered:
+                return courses[title]
+        
+        matches = difflib.get_close_matches(needle, titles.keys(), n=1, cutoff=0.4)
+        return courses[titles[matches[0]]] if matches else None